@@ -1,3 +1,32 @@
+# Generates every card number matching a mask and marks which pass the Luhn check
+# Each ? in the mask is a wildcard digit, e.g. 123456??????7890 is 10^6 candidates
+
+# Usage python CardGenerator-LuhnCheck.py [mask] [-o numbers.txt] [--passed-only] [--echo] [--workers N]
+
+# Output is built as fixed width byte rows in NumPy and written a block at a
+# time. With --workers the keyspace is split into contiguous shards, each
+# written by its own process to numbers.part0.txt, numbers.part1.txt, ...
+
+# With --passed-only and a ? as the last digit, only the other wildcards are
+# enumerated and the one valid check digit is computed for each, instead of
+# testing all ten. Masks are limited to 10^9 candidates.
+
+import argparse
+import os
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+
+# Value of a digit after Luhn doubling (2 * d, minus 9 when it goes above 9)
+LUHN_DOUBLE = np.array([0, 2, 4, 6, 8, 1, 3, 5, 7, 9], dtype=np.uint8)
+
+BLOCK_SIZE = 1000000
+MAX_WILDCARDS = 9    # 10^9 candidates
+DEFAULT_MASK = "123456??????7890"  # Replace with your actual prefix, wildcards and suffix
+PASSED_TEXT = np.frombuffer(b" - Passed Luhn algorithm check\n", dtype=np.uint8)
+FAILED_TEXT = np.frombuffer(b" - Failed Luhn algorithm check\n", dtype=np.uint8)
+
 def luhn_check(number):
     digits = [int(digit) for digit in number]
     for i in range(len(digits) - 2, -1, -2):
@@ -7,25 +36,155 @@ def luhn_check(number):
     total = sum(digits)
     return total % 10 == 0
 
-def main():
-    unchanged_prefix = "123456"  # Replace with your actual unchanged prefix
-    unchanged_suffix = "7890"    # Replace with your actual unchanged suffix
+def digit_array(values, width):
+    """Return a 2-D uint8 array holding the zero padded digits of each value."""
+    if width > 18:
+        # 10^19 no longer fits in int64 and the digits would silently wrap
+        raise ValueError(f"at most 18 digits per value, got {width}")
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return (np.asarray(values, dtype=np.int64)[:, None] // powers % 10).astype(np.uint8)
+
+def luhn_sums(digits, check_digit_present=True):
+    # Sum every row with the Luhn weights. Doubling starts at the second digit
+    # from the right, or at the last digit if the check digit is not there yet
+    digits = np.asarray(digits, dtype=np.uint8)
+    first = -2 if check_digit_present else -1
+    doubled = np.zeros(digits.shape[1], dtype=bool)
+    doubled[first::-2] = True
+    return (
+        digits[:, ~doubled].sum(axis=1, dtype=np.int64)
+        + LUHN_DOUBLE[digits[:, doubled]].sum(axis=1, dtype=np.int64)
+    )
+
+def luhn_check_digits(payload):
+    """The one check digit that makes each row of payload pass Luhn."""
+    return (10 - luhn_sums(payload, check_digit_present=False) % 10) % 10
+
+def luhn_check_mask(mask, start, stop):
+    """Luhn pass/fail for candidates start..stop-1 of a mask such as 123456??????7890.
+
+    Candidate i puts the zero padded digits of i into the ? positions, left to
+    right. The fixed digits never change, so their weighted sum is worked out
+    once and only the wildcard digits are summed per candidate.
+    """
+    wildcards = np.array([char == "?" for char in mask])
+    doubled = np.zeros(len(mask), dtype=bool)
+    doubled[-2::-2] = True
 
-    start_count = 0
-    end_count = 999999
+    fixed = np.array([0 if char == "?" else int(char) for char in mask], dtype=np.uint8)
+    fixed_sum = int(fixed[~doubled].sum() + LUHN_DOUBLE[fixed[doubled]].sum())
 
-    with open("numbers.txt", "w") as output_file:
-        for count in range(start_count, end_count + 1):
-            middle_part = str(count).zfill(6)
-            final_number = unchanged_prefix + middle_part + unchanged_suffix
+    wild_doubled = doubled[wildcards]
+    wild = digit_array(np.arange(start, stop), int(wildcards.sum()))
+    totals = (
+        fixed_sum
+        + wild[:, ~wild_doubled].sum(axis=1, dtype=np.int64)
+        + LUHN_DOUBLE[wild[:, wild_doubled]].sum(axis=1, dtype=np.int64)
+    )
+    return totals % 10 == 0, wild
 
-            if luhn_check(final_number):
-                output = final_number + " - Passed Luhn algorithm check\n"
+def luhn_complete_mask(mask, start, stop):
+    """Wildcard digits of every passing candidate in start..stop-1 of a mask ending in ?.
+
+    Candidate i is payload i // 10 with last digit i % 10, so exactly one
+    candidate in each run of ten passes. Only the payload wildcards are
+    enumerated and luhn_check_digits() supplies that one last digit.
+    """
+    payload_mask = mask[:-1]
+    wildcards = np.array([char == "?" for char in payload_mask])
+    template = np.array([0 if char == "?" else int(char) for char in payload_mask], dtype=np.uint8)
+
+    first, last = start // 10, -(-stop // 10)
+    wild = digit_array(np.arange(first, last), int(wildcards.sum()))
+    payload = np.repeat(template[None, :], len(wild), axis=0)
+    payload[:, wildcards] = wild
+    check = luhn_check_digits(payload).astype(np.uint8)
+
+    # Drop the ends of a range that does not start or stop on a multiple of ten
+    candidates = np.arange(first, last, dtype=np.int64) * 10 + check
+    keep = (candidates >= start) & (candidates < stop)
+    return np.hstack([wild, check[:, None]])[keep]
+
+def render_block(mask, wild, passed, passed_only):
+    # Build every output line as a fixed width row of bytes, no per-number strings
+    wildcards = np.array([char == "?" for char in mask])
+    template = np.frombuffer(mask.replace("?", "0").encode(), dtype=np.uint8)
+
+    if passed_only:
+        wild = wild[passed]
+        rows = np.empty((len(wild), len(mask) + 1), dtype=np.uint8)
+        rows[:, -1] = ord("\n")
+    else:
+        rows = np.empty((len(wild), len(mask) + len(PASSED_TEXT)), dtype=np.uint8)
+        rows[:, len(mask):] = np.where(passed[:, None], PASSED_TEXT, FAILED_TEXT)
+
+    rows[:, :len(mask)] = template
+    rows[:, :len(mask)][:, wildcards] = wild + ord("0")
+    return rows.tobytes()
+
+def generate(mask, start, stop, output_path, passed_only=False, echo=False):
+    """Write candidates start..stop-1 of mask to output_path, return how many passed."""
+    passed_total = 0
+    check_digit_only = passed_only and mask.endswith("?")
+    with open(output_path, "wb", buffering=1024 * 1024) as output_file:
+        for block_start in range(start, stop, BLOCK_SIZE):
+            block_stop = min(block_start + BLOCK_SIZE, stop)
+            if check_digit_only:
+                wild = luhn_complete_mask(mask, block_start, block_stop)
+                passed = np.ones(len(wild), dtype=bool)
             else:
-                output = final_number + " - Failed Luhn algorithm check\n"
+                passed, wild = luhn_check_mask(mask, block_start, block_stop)
+            passed_total += int(passed.sum())
 
-            print(output, end="")
+            # One write per block instead of one per number
+            output = render_block(mask, wild, passed, passed_only)
             output_file.write(output)
+            if echo:
+                sys.stdout.buffer.write(output)
+    return passed_total
+
+def shard_paths(output_path, workers):
+    base, ext = os.path.splitext(output_path)
+    return [f"{base}.part{i}{ext}" for i in range(workers)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate card numbers from a mask and check them with Luhn.")
+    parser.add_argument("mask", nargs="?", default=DEFAULT_MASK, help=f"digits and ? wildcards (default: {DEFAULT_MASK})")
+    parser.add_argument("-o", "--output", default="numbers.txt", help="output file (default: numbers.txt)")
+    parser.add_argument("--passed-only", action="store_true", help="only write numbers that pass the Luhn check")
+    parser.add_argument("--echo", action="store_true", help="also print every line to the terminal (slow)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="split the keyspace across this many processes")
+    args = parser.parse_args()
+
+    if not args.mask or any(char not in "0123456789?" for char in args.mask):
+        print(f"Error: The mask '{args.mask}' may only contain digits and ?.")
+        sys.exit(1)
+    if args.mask.count("?") > MAX_WILDCARDS:
+        print(f"Error: The mask has {args.mask.count('?')} wildcards, at most {MAX_WILDCARDS} (10^{MAX_WILDCARDS} numbers) are supported.")
+        sys.exit(1)
+    if args.workers < 1:
+        print("Error: --workers must be at least 1.")
+        sys.exit(1)
+    if args.echo and args.workers > 1:
+        print("Error: --echo can't be combined with --workers, the shards are written in parallel.")
+        sys.exit(1)
+
+    total = 10 ** args.mask.count("?")
+    if args.workers == 1:
+        passed = generate(args.mask, 0, total, args.output, args.passed_only, args.echo)
+        print(f"[+] {passed} of {total} numbers passed, written to '{args.output}'", file=sys.stderr)
+        return
+
+    # Contiguous shards, so concatenating the part files gives the single file order
+    bounds = [total * i // args.workers for i in range(args.workers + 1)]
+    paths = shard_paths(args.output, args.workers)
+    jobs = [
+        (args.mask, bounds[i], bounds[i + 1], paths[i], args.passed_only, False)
+        for i in range(args.workers)
+    ]
+    with Pool(args.workers) as pool:
+        passed = sum(pool.starmap(generate, jobs))
+    print(f"[+] {passed} of {total} numbers passed, written to {args.workers} files '{paths[0]}' ...", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
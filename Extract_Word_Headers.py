@@ -1,39 +1,64 @@
 # Pulls Header 3 and 4 and extracts them to a text file.
 # Useful for extracting report findings and isntances to Excel
 
+# Usage python Extract_Word_Headers.py report.docx [output.txt] [--levels 1-4] [--json]
+# --levels picks other heading levels, e.g. 2-4 or 1,3. --json writes them as a
+# tree instead, each heading with its subheadings and how many there are of
+# each level below it, including headings in tables and content controls.
+
+import argparse
+import json
 import sys
 import os
-from docx import Document
- 
-def extract_headings(docx_path, output_txt=None):
+from docxheadings import (LEVELS, extract, heading_lines, heading_tree, iter_headings,
+                          parse_levels, write_lines)
+
+def extract_headings(docx_path, output_txt=None, levels=LEVELS):
     if not os.path.isfile(docx_path):
         print(f"[!] File not found: {docx_path}")
         return
- 
+
     if not output_txt:
         base = os.path.splitext(os.path.basename(docx_path))[0]
         output_txt = f"{base}_headings.txt"
- 
-    document = Document(docx_path)
-    headings = []
- 
-    for para in document.paragraphs:
-        if para.style.name in ['Heading 3', 'Heading 4']:
-            text = para.text.strip()
-            if text:
-                headings.append(text)
- 
-    with open(output_txt, 'w', encoding='utf-8') as f:
-        for line in headings:
-            f.write(line + '\n')
- 
+
+    headings = heading_lines(extract(docx_path, levels=levels))
+    write_lines(output_txt, headings)
+
     print(f"[+] Extracted {len(headings)} headings to '{output_txt}'")
- 
+
+def extract_heading_tree(docx_path, output_json=None, levels=LEVELS):
+    if not os.path.isfile(docx_path):
+        print(f"[!] File not found: {docx_path}")
+        return
+
+    if not output_json:
+        base = os.path.splitext(os.path.basename(docx_path))[0]
+        output_json = f"{base}_headings.json"
+
+    tree = heading_tree(iter_headings(docx_path, levels))
+    with open(output_json, 'w', encoding='utf-8') as f:
+        json.dump({"report": os.path.basename(docx_path), "levels": list(levels), **tree},
+                  f, indent=2, ensure_ascii=False)
+
+    print(f"[+] Extracted {sum(tree['counts'].values())} headings to '{output_json}'")
+
+def _levels(spec):
+    try:
+        return parse_levels(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python extract_headings.py <input.docx> [output.txt]")
+    parser = argparse.ArgumentParser(description="Extract the headings of a Word report to a text or JSON file.")
+    parser.add_argument("input", help="report .docx")
+    parser.add_argument("output", nargs="?", help="output file (default: <report>_headings.txt or .json)")
+    parser.add_argument("--levels", type=_levels, default=LEVELS, help="heading levels, e.g. 1-4 or 2,3 (default: 3-4)")
+    parser.add_argument("--json", action="store_true", help="write a JSON tree with counts at every level")
+    args = parser.parse_args()
+
+    if args.json:
+        extract_heading_tree(args.input, args.output, args.levels)
     else:
-        input_file = sys.argv[1]
-        output_file = sys.argv[2] if len(sys.argv) >= 3 else None
-        extract_headings(input_file, output_file)
- 
+        extract_headings(args.input, args.output, args.levels)
+
@@ -1,74 +1,133 @@
 # Use to both list and count the names of findings in a pentest report which uses this header structure
 # Also count the number of each occurence for the summary table
 
+# Usage python Extract_and_Count_Word_Headers.py report.docx
+#       python Extract_and_Count_Word_Headers.py reports/ [--output findings.csv] [--processes 8]
+#                                                [--cache headings_cache.db | --no-cache]
+
+# Given a directory, every .docx under it is processed across a process pool and
+# the findings of all reports are merged into one table with a row per (report,
+# finding, instance count), ready to paste into Excel. It is tab separated
+# unless the output name ends in .csv. Results are cached by the content hash
+# of each report (see headingcache.py), so a re-run only parses reports that
+# were added or edited since.
+
+import argparse
+import csv
 import sys
 import os
-from docx import Document
+from multiprocessing import Pool
 
-def extract_findings_and_instances(docx_path, output_txt):
-    document = Document(docx_path)
-    headings = []
+from docxheadings import (READ_ERRORS, extract, find_reports, findings_and_instances_lines,
+                          finding_count_lines, write_lines)
+from headingcache import HeadingCache, file_digest
 
-    for para in document.paragraphs:
-        style = para.style.name
-        text = para.text.strip()
-        if style == 'Heading 3' and text:
-            headings.append('\n' + text)
-        elif style == 'Heading 4' and text:
-            headings.append(text)
+DEFAULT_CACHE = "headings_cache.db"
+TABLE_HEADER = ["report", "finding", "instances"]
 
-    with open(output_txt, 'w', encoding='utf-8') as f:
-        for line in headings:
-            f.write(line + '\n')
+def extract_findings_and_instances(docx_path, output_txt, extraction=None):
+    extraction = extraction or extract(docx_path)
+    write_lines(output_txt, findings_and_instances_lines(extraction))
 
     print(f"[+] Extracted Findings and Instances to '{output_txt}'")
 
-def extract_finding_and_count(docx_path, output_txt):
-    document = Document(docx_path)
-    lines = []
-    paragraphs = document.paragraphs
-    i = 0
-    total = len(paragraphs)
-
-    while i < total:
-        para = paragraphs[i]
-        style = para.style.name
-        text = para.text.strip()
-
-        if style == 'Heading 3' and text:
-            h3_text = text
-            h4_count = 0
-            i += 1
-
-            while i < total:
-                next_para = paragraphs[i]
-                next_style = next_para.style.name
-                next_text = next_para.text.strip()
-
-                if next_style == 'Heading 4' and next_text:
-                    h4_count += 1
-                    i += 1
-                elif next_style == 'Heading 3':
-                    break
-                else:
-                    i += 1
-
-            lines.append(f"{h3_text}\t{h4_count}")
-        else:
-            i += 1
-
-    with open(output_txt, 'w', encoding='utf-8') as f:
-        for line in lines:
-            f.write(line + '\n')
+def extract_finding_and_count(docx_path, output_txt, extraction=None):
+    extraction = extraction or extract(docx_path)
+    lines = finding_count_lines(extraction)
+    write_lines(output_txt, lines)
 
     print(f"[+] Extracted {len(lines)} Finding names and count to '{output_txt}'")
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python merged_extract.py <input.docx>")
-        sys.exit(1)
-
-    input_file = sys.argv[1]
+def _digest_report(docx_path):
+    # Runs in a worker process, errors are returned so one bad report doesn't stop the rest
+    try:
+        return docx_path, file_digest(docx_path), None
+    except OSError as e:
+        return docx_path, None, str(e)
+
+def _extract_report(docx_path):
+    try:
+        return docx_path, extract(docx_path), None
+    except READ_ERRORS as e:
+        return docx_path, None, f"{type(e).__name__}: {e}"
+
+def extract_directory(directory, cache=None, processes=None):
+    """Extract every report under directory, serving unchanged ones from cache.
+
+    Returns [(path, Extraction)] sorted by path. Reports that cannot be read
+    are reported and left out.
+    """
+    paths = find_reports(directory)
+    if not paths:
+        return []
+
+    results = {}
+    with Pool(min(processes or os.cpu_count() or 1, len(paths))) as pool:
+        digests = {}
+        to_parse = paths
+        if cache is not None:
+            # Hashing reads every byte, so it is spread over the pool as well
+            to_parse = []
+            for path, digest, error in pool.imap(_digest_report, paths):
+                if error:
+                    print(f"[!] Skipping '{path}': {error}")
+                    continue
+                extraction = cache.get(digest)
+                if extraction is None:
+                    digests[path] = digest
+                    to_parse.append(path)
+                else:
+                    results[path] = extraction
+
+        for path, extraction, error in pool.imap(_extract_report, to_parse):
+            if error:
+                print(f"[!] Skipping '{path}': {error}")
+                continue
+            results[path] = extraction
+            if cache is not None:
+                cache.put(digests[path], extraction)
+
+    return sorted(results.items())
+
+def write_findings_table(reports, directory, output):
+    """Write one (report, finding, instances) row per finding, returns the row count."""
+    delimiter = "," if output.lower().endswith(".csv") else "\t"
+    rows = 0
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(TABLE_HEADER)
+        for path, extraction in reports:
+            report = os.path.relpath(path, directory)
+            for title, instances in extraction.findings:
+                writer.writerow([report, title, len(instances)])
+                rows += 1
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="List and count the findings (Heading 3) and instances (Heading 4) in pentest reports.")
+    parser.add_argument("path", help="report .docx, or a directory of reports to merge into one table")
+    parser.add_argument("-o", "--output", help="directory mode: merged table, .csv or tab separated (default: <directory>_findings.tsv)")
+    parser.add_argument("-p", "--processes", type=int, help="directory mode: worker processes (default: CPU count)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help=f"directory mode: extraction cache (default: {DEFAULT_CACHE})")
+    parser.add_argument("--no-cache", action="store_true", help="directory mode: parse every report, do not read or write the cache")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        directory = args.path
+        output = args.output or f"{os.path.basename(os.path.abspath(directory))}_findings.tsv"
+        cache = None if args.no_cache else HeadingCache(args.cache)
+        try:
+            reports = extract_directory(directory, cache, args.processes)
+        finally:
+            if cache is not None:
+                cache.close()
+        rows = write_findings_table(reports, directory, output)
+        print(f"[+] Extracted {rows} findings from {len(reports)} reports to '{output}'")
+        if cache is not None:
+            print(f"[+] Cache: {cache.hits} reports unchanged, {cache.misses} parsed", file=sys.stderr)
+        return
+
+    input_file = args.path
     if not os.path.isfile(input_file):
         print(f"[!] File not found: {input_file}")
         sys.exit(1)
@@ -77,5 +136,10 @@ if __name__ == "__main__":
     findings_and_instances_file = f"{base}_findings_and_instances.txt"
     finding_and_count_file = f"{base}_finding_and_count.txt"
 
-    extract_findings_and_instances(input_file, findings_and_instances_file)
-    extract_finding_and_count(input_file, finding_and_count_file)
+    # Both files come from one load and one walk of the document
+    extraction = extract(input_file)
+    extract_findings_and_instances(input_file, findings_and_instances_file, extraction)
+    extract_finding_and_count(input_file, finding_and_count_file, extraction)
+
+if __name__ == "__main__":
+    main()
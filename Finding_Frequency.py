@@ -0,0 +1,135 @@
+# Count how often findings appear across all pentest reports, and how that changes over time
+
+# Usage python Finding_Frequency.py update reports/ [more_reports/ ...] [--index findings.db] [--processes 8]
+#       python Finding_Frequency.py top [--year 2025] [--limit 20]
+#       python Finding_Frequency.py finding "SMB signing not required" [--by month]
+
+# update extracts the findings (Heading 3) and instance counts (Heading 4) of
+# every .docx under the given directories into a SQLite index (see
+# findingindex.py). Reports already indexed are skipped unless their content
+# changed, and reports that were removed are dropped, so it can run after
+# every engagement. top and finding only read the index, never the reports.
+
+# Near-duplicate titles ("Finding 3: SMB Signing Not Required" / "SMB signing
+# not required.") are counted together. finding lists every variant of the
+# title that was grouped, so a wrong grouping is easy to spot.
+
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from docxheadings import READ_ERRORS, extract, find_reports, report_properties
+from findingindex import FindingIndex
+from headingcache import file_digest
+
+DEFAULT_INDEX = "findings.db"
+
+def _digest_report(docx_path):
+    # Runs in a worker process, errors are returned so one bad report doesn't stop the rest
+    try:
+        return docx_path, file_digest(docx_path), None
+    except OSError as e:
+        return docx_path, None, str(e)
+
+def _extract_report(docx_path):
+    try:
+        return docx_path, extract(docx_path), report_properties(docx_path), None
+    except READ_ERRORS as e:
+        return docx_path, None, None, f"{type(e).__name__}: {e}"
+
+def update_index(index, directories, processes=None):
+    """Bring index up to date with every report under directories.
+
+    Returns (reports extracted, reports unchanged, reports removed).
+    """
+    paths = [path for directory in directories for path in find_reports(directory)]
+    removed = index.remove_stale(directories, paths)
+    changed = [path for path in paths if not index.is_current(path)]
+    if not changed:
+        return 0, len(paths), removed
+
+    parsed = 0
+    with Pool(min(processes or os.cpu_count() or 1, len(changed))) as pool:
+        # A touched report with the same content only needs its mtime refreshed
+        digests = {}
+        for path, digest, error in pool.imap(_digest_report, changed):
+            if error:
+                print(f"[!] Skipping '{path}': {error}")
+            elif not index.has_digest(path, digest):
+                digests[path] = digest
+
+        for path, extraction, properties, error in pool.imap(_extract_report, list(digests)):
+            if error:
+                print(f"[!] Skipping '{path}': {error}")
+                continue
+            index.add_report(path, extraction, properties, digests[path])
+            parsed += 1
+            print(f"[+] Indexed '{path}': {len(extraction.findings)} findings")
+    return parsed, len(paths) - len(digests), removed
+
+def print_top(index, year=None, limit=20):
+    rows = index.top(year, limit)
+    reports = index.report_count(year)
+    scope = f"{year} reports" if year is not None else "reports"
+    if not rows:
+        print(f"No findings indexed for {scope}.")
+        return
+    print(f"Top {len(rows)} findings across {reports} {scope}:")
+    width = max(len(name) for name, _, _ in rows)
+    for name, found, instances in rows:
+        print(f"  {name:<{width}}  {found:>5} reports ({found / reports:6.1%})  {instances:>6} instances")
+
+def print_finding(index, text, by="year"):
+    group_ids = index.find_groups(text)
+    if not group_ids:
+        print(f"No indexed finding matches '{text}'.")
+        return
+    for group_id in group_ids:
+        print(f"\n{index.group_name(group_id)}")
+        print("  Written as:")
+        for title, found in index.variants(group_id):
+            print(f"    {title} ({found} reports)")
+        print(f"  By {by}:")
+        for period, found, total, instances in index.trend(group_id, by):
+            print(f"    {period}  {found:>5}/{total:<5} reports ({found / total:6.1%})  {instances:>6} instances")
+
+def main():
+    parser = argparse.ArgumentParser(description="Count how often findings appear across pentest reports.")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help=f"SQLite finding index (default: {DEFAULT_INDEX})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    update = commands.add_parser("update", help="index the reports in one or more directories")
+    update.add_argument("directories", nargs="+", help="directories of .docx reports, searched recursively")
+    update.add_argument("-p", "--processes", type=int, help="worker processes (default: CPU count)")
+
+    top = commands.add_parser("top", help="most widespread findings")
+    top.add_argument("--year", type=int, help="only count reports from this year")
+    top.add_argument("--limit", type=int, default=20, help="findings to list (default: 20)")
+
+    finding = commands.add_parser("finding", help="frequency and trend of one finding")
+    finding.add_argument("title", help="finding title, matched loosely")
+    finding.add_argument("--by", choices=["year", "month"], default="year", help="trend period (default: year)")
+    args = parser.parse_args()
+
+    if args.command == "update":
+        for directory in args.directories:
+            if not os.path.isdir(directory):
+                print(f"Error: The directory '{directory}' does not exist.")
+                sys.exit(1)
+
+    started = time.perf_counter()
+    with FindingIndex(args.index) as index:
+        if args.command == "update":
+            parsed, unchanged, removed = update_index(index, args.directories, args.processes)
+            print(f"[+] {parsed} reports indexed, {unchanged} unchanged, {removed} removed, "
+                  f"{index.report_count()} in '{args.index}'")
+        elif args.command == "top":
+            print_top(index, args.year, args.limit)
+        else:
+            print_finding(index, args.title, args.by)
+    print(f"[*] Done in {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
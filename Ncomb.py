@@ -3,38 +3,149 @@
 # Combs NMAP Grepable File for all ports and services associated with each IP
 
 # Usage python ncomb.py nmapScanResults.gnmap
+#       python ncomb.py nmapScanResults.xml
+#       python ncomb.py nmapScanResults.gnmap --index scans.db
+#       python ncomb.py nmapScanResults.gnmap --index scans.db --port 445
+#       python ncomb.py nmapScanResults.gnmap --index scans.db --host 10.0.3.7
+#       python ncomb.py nmapScanResults.gnmap --state open,open|filtered --proto udp
+#       python ncomb.py nmapScanResults.gnmap --quiet --csv scan.csv --npz scan.npz --summary
 
+# Every port state and protocol in the file is parsed. Only open ports are shown
+# unless --state says otherwise, and --proto limits the output to e.g. udp.
+
+# NMAP XML (-oX) files are detected automatically and streamed, which also fills
+# in the hostname, OS match and service version for each host.
+
+# With --index the parsed hosts are kept in a SQLite file. Later runs only parse
+# scans appended since the last run, and --port / --host are answered from it.
+
+# --csv and --npz write one row per (host, port) in batches while streaming.
+# --summary prints per-port and per-/24 counts computed from the .npz table.
+
+import argparse
+import os
 import sys
-import re
-
-# Check if the file name is provided as an argument
-if len(sys.argv) < 2:
-    print("Usage: python script_name.py filename.gnmap")
-    sys.exit(1)
-
-filename = sys.argv[1]
-
-# Open the gnmap file with a different encoding (ISO-8859-1 in this case)
-with open(filename, "r", encoding="ISO-8859-1") as f:
-    lines = f.readlines()
-
-# Regular expression pattern to extract IP and port information
-pattern = r"Host:\s+(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}).*Ports:\s+(.*)"
-
-# Iterate through each line in the file
-for line in lines:
-    # Search for the pattern in the line
-    match = re.search(pattern, line)
-    if match:
-        ip = match.group(1)  # Extract IP address
-        ports = match.group(2)  # Extract port information
-
-        # Split port information into individual ports
-        port_list = re.findall(r"(\d+)/open/tcp//([^/]*)//([^,]*)", ports)
-        
-        # Print IP address
-        print(f"\n",ip,"\n   Hostname - \n   OS - ")
-
-        # Print port information for each port
-        for port, service, info in port_list:
-            print(f"\t{port}/{service}/tcp  open  {service} {info}")
+
+from gnmapparse import parse_gnmap
+from nmapxml import is_nmap_xml, parse_nmap_xml
+
+
+def print_host(host):
+    # Print IP address and port information for each port in a single write
+    lines = [f"\n {host.ip} \n   Hostname - {host.hostname}\n   OS - {host.os}"]
+    lines += [
+        f"\t{port.port}/{port.service}/{port.proto}  {port.state}  {port.service} {port.info}"
+        for port in host.ports
+    ]
+    print("\n".join(lines))
+
+
+def port_filter(states, protos):
+    """Return a function that keeps only the ports matching --state/--proto."""
+    states = None if states == "all" else set(states.split(","))
+    protos = None if protos == "all" else set(protos.split(","))
+
+    def keep(host):
+        ports = [
+            port for port in host.ports
+            if (states is None or port.state in states) and (protos is None or port.proto in protos)
+        ]
+        # Most hosts lose nothing, so skip building a new record for them
+        if len(ports) == len(host.ports):
+            return host
+        return host._replace(ports=ports)
+
+    return keep
+
+
+def comb(hosts, args):
+    # Print and/or export every host as it is streamed
+    keep = port_filter(args.state, args.proto)
+    exporter = None
+    if args.csv or args.npz:
+        from nmapexport import ScanExporter
+        exporter = ScanExporter(csv_path=args.csv, npz_path=args.npz)
+
+    for host in hosts:
+        host = keep(host)
+        if not args.quiet:
+            print_host(host)
+        if exporter:
+            exporter.add(host)
+
+    if exporter:
+        exporter.close()
+        print(f"[+] Exported {exporter.rows} port rows", file=sys.stderr)
+
+    if args.summary:
+        print_summary(args.npz)
+
+
+def print_summary(npz_path, limit=20):
+    from nmapexport import load_table, port_summary, subnet_summary
+
+    table = load_table(npz_path)
+
+    print(f"\nTop {limit} open ports")
+    for port, proto, hosts in port_summary(table)[:limit]:
+        print(f"\t{port}/{proto}\t{hosts} hosts")
+
+    print(f"\nTop {limit} /24 subnets by open ports")
+    for subnet, hosts, ports in subnet_summary(table)[:limit]:
+        print(f"\t{subnet}\t{hosts} hosts\t{ports} open ports")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comb an NMAP grepable file for the ports and services of each IP.")
+    parser.add_argument("filename", help="NMAP grepable (.gnmap) or XML (-oX) file")
+    parser.add_argument("--index", metavar="DB", help="SQLite index to update and answer queries from")
+    parser.add_argument("--port", type=int, help="only show hosts with this port open (requires --index)")
+    parser.add_argument("--host", metavar="IP", help="only show the ports for this IP (requires --index)")
+    parser.add_argument("--state", default="open",
+                        help="comma-separated port states to keep, e.g. open,open|filtered, or all (default: open)")
+    parser.add_argument("--proto", default="all",
+                        help="comma-separated protocols to keep, e.g. tcp,udp, or all (default: all)")
+    parser.add_argument("--csv", metavar="FILE", help="also write one row per host and port to a CSV file")
+    parser.add_argument("--npz", metavar="FILE", help="also write a columnar NumPy .npz table")
+    parser.add_argument("--summary", action="store_true", help="print per-port and per-/24 counts (requires --npz)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the per-host text output")
+    args = parser.parse_args()
+
+    if (args.port is not None or args.host) and not args.index:
+        parser.error("--port and --host require --index")
+    if args.summary and not args.npz:
+        parser.error("--summary requires --npz")
+
+    if not os.path.isfile(args.filename):
+        print(f"Error: The file '{args.filename}' does not exist.")
+        sys.exit(1)
+
+    if is_nmap_xml(args.filename):
+        if args.index:
+            parser.error("--index only supports grepable (.gnmap) files")
+        # Stream hosts from the XML file, clearing each one once printed
+        comb(parse_nmap_xml(args.filename), args)
+        return
+
+    if not args.index:
+        # Stream hosts from the gnmap file (ISO-8859-1 encoding) one line at a time
+        comb(parse_gnmap(args.filename), args)
+        return
+
+    from gnmapindex import GnmapIndex
+
+    with GnmapIndex(args.index) as index:
+        index.update(args.filename)
+        if args.host:
+            hosts = index.host(args.filename, args.host)
+        elif args.port is not None:
+            protos = None if args.proto == "all" else args.proto.split(",")
+            hosts = index.hosts_with_port(args.filename, args.port, protos=protos)
+        else:
+            hosts = index.hosts(args.filename)
+
+        comb(hosts, args)
+
+
+if __name__ == "__main__":
+    main()
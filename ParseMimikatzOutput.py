@@ -1,77 +1,352 @@
 # mimi mimikatz hash grabber
 
+# Usage python ParseMimikatzOutput.py <dump>
+#       python ParseMimikatzOutput.py <dump> [<dump> ...] [--index mimikatz.db]
+#       python ParseMimikatzOutput.py <directory> [--index mimikatz.db]
+
+# Given several dumps or a directory, the dumps are parsed in parallel into a
+# persistent dedup index (see mimikatzindex.py). Re-running after adding a dump
+# only parses that dump, and the hash reuse report is read from the index.
+
+import argparse
+import json
 import re
 import sys
 import os
+from functools import partial
+from multiprocessing import Pool
+
+from mimikatzindex import MimikatzIndex, dump_host
+
+DEFAULT_INDEX = "mimikatz.db"
+
+# One anchored alternation dispatches every "* Field : value" line; the named
+# group that matched says which field it was
+FIELD_PATTERN = re.compile(
+    r"^\s*\*\s*(?:"
+    r"Username\s*:\s*(?P<User>\S+)"
+    r"|Domain\s*:\s*(?P<Domain>\S+)"
+    r"|NTLM\s*:\s*(?P<NTLM>[a-fA-F0-9]+)"
+    r"|SHA1\s*:\s*(?P<SHA1>[a-fA-F0-9]+)"
+    r"|Password\s*:\s*(?P<Password>.*\S)"
+    r")"
+)
+
+# Lines without a "*": the start of a logon session, the package a block
+# belongs to ("\twdigest :") and the Kerberos keys listed by sekurlsa::ekeys or lsadump::dcsync
+# ("aes256_hmac       <key>" or "aes256_hmac       (4096) : <key>")
+SECTION_PATTERN = re.compile(
+    r"^\s*(?:"
+    r"(?P<Session>Authentication Id)\s*:"
+    r"|(?P<Package>msv|tspkg|wdigest|kerberos|ssp|credman|livessp|cloudap)\s*:"
+    r"|(?P<KeyType>aes256_hmac|aes128_hmac|rc4_hmac_nt|des_cbc_md5)\s+(?:\(\d+\)\s*:\s*)?(?P<Key>[a-fA-F0-9]+)\s*$"
+    r")"
+)
+
+# Credential type of each Kerberos key in the typed output
+KEY_TYPES = {
+    "aes256_hmac": "aes256",
+    "aes128_hmac": "aes128",
+    "rc4_hmac_nt": "rc4",
+    "des_cbc_md5": "des",
+}
+
+# hashcat modes for the types hashcat can crack directly. The msv SHA1 is
+# sha1(utf16le(password)) and an rc4_hmac_nt key is the NT hash itself
+HASHCAT_MODES = {"ntlm": 1000, "rc4": 1000, "sha1": 170}
+
+def iter_logon_blocks(lines):
+    """Yield every credential block in a mimikatz dump, in file order.
+
+    A block starts at a "* Username" line and ends at the next one or at the
+    end of the input. Each block is a dict with the User, Domain, NTLM Hash,
+    SHA1 Hash and Password fields (None when absent), the Kerberos Keys found
+    in it as {key type: key} and the Package (msv, wdigest, ...) it was in.
+    """
+    package = None
+    block = None
+
+    for line in lines:
+        # Cheap check first, only "* Field :" lines reach the field regex
+        if "*" in line:
+            match = FIELD_PATTERN.match(line)
+            if match is None:
+                continue
+            field = match.lastgroup
+            if field == "User":
+                if block:
+                    yield block
+                block = {
+                    'User': match.group(field), 'Domain': None, 'NTLM Hash': None,
+                    'SHA1 Hash': None, 'Password': None, 'Keys': {}, 'Package': package,
+                }
+            elif block:
+                if field == "NTLM":
+                    block['NTLM Hash'] = match.group(field)
+                elif field == "SHA1":
+                    block['SHA1 Hash'] = match.group(field)
+                else:
+                    block[field] = match.group(field)
+        elif ":" in line or "_" in line:
+            match = SECTION_PATTERN.match(line)
+            if match is None:
+                continue
+            if match.lastgroup == "Session":
+                package = None
+            elif match.lastgroup == "Package":
+                package = match.group("Package")
+            elif block:
+                block['Keys'][match.group("KeyType")] = match.group("Key")
+
+    if block:
+        yield block
+
+def block_user(block):
+    """The User/Domain/NTLM Hash dict for a block, or None without a usable NTLM hash."""
+    if block['NTLM Hash'] and block['NTLM Hash'] != 'None':
+        return {'User': block['User'], 'Domain': block['Domain'], 'NTLM Hash': block['NTLM Hash']}
+    return None
+
+def block_credentials(block):
+    """Typed credential records (type, user, domain, value, package) for a block."""
+    values = []
+    if block['NTLM Hash'] and block['NTLM Hash'] != 'None':
+        values.append(("ntlm", block['NTLM Hash']))
+    if block['SHA1 Hash']:
+        values.append(("sha1", block['SHA1 Hash']))
+    if block['Password'] and block['Password'] != '(null)':
+        values.append(("password", block['Password']))
+    for key_type, key in block['Keys'].items():
+        values.append((KEY_TYPES[key_type], key))
+
+    return [
+        {'type': cred_type, 'user': block['User'], 'domain': block['Domain'],
+         'value': value, 'package': block['Package']}
+        for cred_type, value in values
+    ]
+
+def iter_mimikatz_users(lines):
+    """Yield each unique user dict as soon as its block is complete.
+
+    Users without an NTLM hash are skipped, and each (User, Domain, NTLM Hash)
+    is only yielded the first time it is seen.
+    """
+    unique_users = set()
+    for block in iter_logon_blocks(lines):
+        user = block_user(block)
+        if user:
+            user_key = (user['User'], user['Domain'], user['NTLM Hash'])
+            if user_key not in unique_users:
+                unique_users.add(user_key)
+                yield user
+
+class CredentialWriter:
+    """Write typed credential records to PREFIX.jsonl and one file per type.
+
+    hash types hashcat cracks directly are written as user:hash, for use with
+    hashcat --username. Each (type, user, domain, value) is written once.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.seen = set()
+        self.counts = {}
+        self.files = {}
+        self.jsonl = open(f"{prefix}.jsonl", "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def path(self, cred_type):
+        return f"{self.prefix}_{cred_type}.txt"
+
+    def add(self, record, host=None):
+        key = (record['type'], record['user'], record['domain'], record['value'])
+        if key in self.seen:
+            return
+        self.seen.add(key)
+
+        if host is not None:
+            record = dict(record, host=host)
+        self.jsonl.write(json.dumps(record) + "\n")
+
+        cred_type = record['type']
+        out = self.files.get(cred_type)
+        if out is None:
+            out = self.files[cred_type] = open(self.path(cred_type), "w", encoding="utf-8")
+        account = f"{record['domain']}\\{record['user']}" if record['domain'] else record['user']
+        out.write(f"{account}:{record['value']}\n")
+        self.counts[cred_type] = self.counts.get(cred_type, 0) + 1
+
+    def close(self):
+        self.jsonl.close()
+        for out in self.files.values():
+            out.close()
+
+    def report(self):
+        print(f"\n[+] Wrote {len(self.seen)} credentials to '{self.prefix}.jsonl'")
+        for cred_type, count in sorted(self.counts.items()):
+            mode = HASHCAT_MODES.get(cred_type)
+            hint = f" (hashcat -m {mode} --username)" if mode else ""
+            print(f"[+] Wrote {count} {cred_type} to '{self.path(cred_type)}'{hint}")
 
 def parse_mimikatz_output(output):
+    users = list(iter_mimikatz_users(output.splitlines()))
+    ntlm_hashes = set(user['NTLM Hash'] for user in users)
+    return users, ntlm_hashes
+
+def find_dump_files(directory):
+    """Return the sorted paths of the files directly inside directory."""
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if not name.startswith(".") and os.path.isfile(os.path.join(directory, name))
+    )
+
+def _parse_dump(filename, extract=False):
+    # Runs in a worker process, errors are returned so one bad dump doesn't stop the rest.
+    # Users and (with extract) typed credentials come out of the same read
     users = []
+    records = []
     unique_users = set()
-    ntlm_hashes = set()
-    
-    lines = output.splitlines()
-    current_user = None
-    
-    for line in lines:
-        # Check for user name
-        user_match = re.match(r"^\s*\*\s*Username\s*:\s*(\S+)", line)
-        if user_match:
-            if current_user and current_user['NTLM Hash'] and current_user['NTLM Hash'] != 'None':
-                user_key = (current_user['User'], current_user['Domain'], current_user['NTLM Hash'])
-                if user_key not in unique_users:
-                    users.append(current_user)
-                    unique_users.add(user_key)
-                    ntlm_hashes.add(current_user['NTLM Hash'])
-            current_user = {'User': user_match.group(1), 'Domain': None, 'NTLM Hash': None}
-        
-        # Check for domain
-        domain_match = re.match(r"^\s*\*\s*Domain\s*:\s*(\S+)", line)
-        if domain_match and current_user:
-            current_user['Domain'] = domain_match.group(1)
-        
-        # Check for NTLM hash
-        ntlm_match = re.match(r"^\s*\*\s*NTLM\s*:\s*([a-fA-F0-9]+)", line)
-        if ntlm_match and current_user:
-            current_user['NTLM Hash'] = ntlm_match.group(1)
-    
-    # Add the last user to the list if it's valid
-    if current_user and current_user['NTLM Hash'] and current_user['NTLM Hash'] != 'None':
-        user_key = (current_user['User'], current_user['Domain'], current_user['NTLM Hash'])
-        if user_key not in unique_users:
-            users.append(current_user)
+    try:
+        with open(filename, 'r', errors='replace') as file:
+            for block in iter_logon_blocks(file):
+                user = block_user(block)
+                if user:
+                    user_key = (user['User'], user['Domain'], user['NTLM Hash'])
+                    if user_key not in unique_users:
+                        unique_users.add(user_key)
+                        users.append(user)
+                if extract:
+                    records.extend(block_credentials(block))
+        return filename, users, records, None
+    except OSError as e:
+        return filename, [], [], str(e)
+
+def index_dumps(filenames, index, processes=None, writer=None):
+    """Parse every new or changed dump into index, return how many were parsed.
+
+    With a CredentialWriter every dump is read, so the extracted files cover
+    all of them, but the index is still only updated for new or changed dumps.
+    """
+    pending = {filename for filename in filenames if not index.is_current(filename)}
+    to_parse = filenames if writer else [filename for filename in filenames if filename in pending]
+    if not to_parse:
+        return 0
+
+    with Pool(min(processes or os.cpu_count() or 1, len(to_parse))) as pool:
+        # Parsing is spread over the pool, the index and files are written from this process only
+        results = pool.imap(partial(_parse_dump, extract=writer is not None), to_parse)
+        for filename, users, records, error in results:
+            if error:
+                print(f"[!] Skipping '{filename}': {error}")
+                continue
+            if writer:
+                for record in records:
+                    writer.add(record, host=dump_host(filename))
+            if filename in pending:
+                added = index.add_dump(filename, users)
+                print(f"[+] Indexed '{filename}': {len(users)} users, {added} new")
+    return len(pending)
+
+def print_index(index):
+    credentials = index.credentials()
+    if not credentials:
+        print("No valid users with NTLM hashes found in the indexed dumps.")
+        return
+
+    print("User details:")
+    for user, domain, ntlm, hosts in credentials:
+        print(f"User: {user}, Domain: {domain}, NTLM Hash: {ntlm}, Hosts: {', '.join(hosts)}")
+
+    print("\nNTLM Hashes:")
+    for ntlm in dict.fromkeys(ntlm for _, _, ntlm, _ in credentials):
+        print(ntlm)
+
+    reuse = index.hash_reuse()
+    print("\nHash reuse:")
+    if not reuse:
+        print("No NTLM hash is shared by more than one account.")
+    for ntlm, accounts in reuse:
+        print(f"{ntlm} - {len(accounts)} accounts")
+        for user, domain, hosts in accounts:
+            print(f"    {domain}\\{user} ({', '.join(hosts)})")
+
+def print_dump(filename, writer=None):
+    unique_users = set()
+    ntlm_hashes = {}
+    with open(filename, 'r', errors='replace') as file:
+        # Users are printed as each block completes, the file is never held in memory
+        for block in iter_logon_blocks(file):
+            if writer:
+                for record in block_credentials(block):
+                    writer.add(record)
+
+            user = block_user(block)
+            if not user:
+                continue
+            user_key = (user['User'], user['Domain'], user['NTLM Hash'])
+            if user_key in unique_users:
+                continue
+            if not unique_users:
+                print("User details:")
             unique_users.add(user_key)
-            ntlm_hashes.add(current_user['NTLM Hash'])
-    
-    return users, ntlm_hashes
+            print(f"User: {user['User']}, Domain: {user['Domain']}, NTLM Hash: {user['NTLM Hash']}")
+            ntlm_hashes[user['NTLM Hash']] = None
+
+    if not ntlm_hashes:
+        print("No valid users with NTLM hashes found in the file.")
+    else:
+        print("\nNTLM Hashes:")
+        for hash_value in ntlm_hashes:
+            print(hash_value)
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python script.py <filename>")
-        sys.exit(1)
-    
-    filename = sys.argv[1]
-    
-    if not os.path.isfile(filename):
-        print(f"Error: The file '{filename}' does not exist.")
-        sys.exit(1)
-    
+    parser = argparse.ArgumentParser(description="Pull users and NTLM hashes out of mimikatz output.")
+    parser.add_argument("paths", nargs="+", help="mimikatz dump file(s) or a directory of dumps")
+    parser.add_argument("--index", help=f"dedup index to update, used by default for several dumps (default: {DEFAULT_INDEX})")
+    parser.add_argument("--extract", metavar="PREFIX", help="also write every credential type to PREFIX.jsonl and PREFIX_<type>.txt")
+    parser.add_argument("-p", "--processes", type=int, help="worker processes for parsing dumps (default: CPU count)")
+    args = parser.parse_args()
+
+    filenames = []
+    directories = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            directories.append(path)
+            filenames.extend(find_dump_files(path))
+        elif os.path.isfile(path):
+            filenames.append(path)
+        else:
+            print(f"Error: The file '{path}' does not exist.")
+            sys.exit(1)
+
+    writer = CredentialWriter(args.extract) if args.extract else None
     try:
-        with open(filename, 'r') as file:
-            mimikatz_output = file.read()
-        
-        users, ntlm_hashes = parse_mimikatz_output(mimikatz_output)
-        
-        if not users:
-            print("No valid users with NTLM hashes found in the file.")
+        # A single dump file is printed directly, a directory always goes
+        # through the index however many dumps it holds right now
+        if len(args.paths) == 1 and not directories and not args.index:
+            print_dump(filenames[0], writer)
         else:
-            print("User details:")
-            for user in users:
-                print(f"User: {user['User']}, Domain: {user['Domain']}, NTLM Hash: {user['NTLM Hash']}")
-            
-            print("\nNTLM Hashes:")
-            for hash_value in ntlm_hashes:
-                print(hash_value)
-    
+            index_path = args.index or DEFAULT_INDEX
+            # Never treat the index itself as a dump when it sits in the dump directory
+            filenames = [f for f in filenames if os.path.abspath(f) != os.path.abspath(index_path)]
+            with MimikatzIndex(index_path) as index:
+                removed = index.remove_stale(directories, filenames)
+                if removed:
+                    print(f"[+] Removed {removed} dumps that were deleted or moved")
+                parsed = index_dumps(filenames, index, args.processes, writer)
+                print(f"[+] {parsed} dumps parsed, {len(filenames) - parsed} unchanged, {index.dump_count()} in '{index_path}'\n")
+                print_index(index)
+
+        if writer:
+            writer.close()
+            writer.report()
+
     except Exception as e:
         print(f"An error occurred: {e}")
         sys.exit(1)
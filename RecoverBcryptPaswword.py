@@ -1,21 +1,352 @@
+# Checks a wordlist against a bcrypt hash from an app we are authorized to audit
+
+# Usage python RecoverBcryptPaswword.py [--hash HASH] [--wordlist passwords.txt]
+#                                      [--workers N] [--chunk-size N] [--checkpoint FILE]
+#       python RecoverBcryptPaswword.py --hashes hashes.txt [--wordlist passwords.txt] [--output results.jsonl]
+
+# The wordlist is streamed in chunks to a process pool sized to the machine.
+# Misses are not printed, progress is reported as candidates per second, and
+# every worker stops as soon as one of them finds the match. With --checkpoint
+# the number of wordlist lines fully checked is saved as the run goes, so an
+# interrupted run picks up where it left off.
+
+# --hashes audits a whole user table export, one hash or user:hash per line.
+# Hashes are grouped by bcrypt cost and the cheapest group runs first, so most
+# results arrive early. A cracked hash is dropped from the work queue and every
+# worker skips it from then on. Results are written as JSON lines.
+
+import argparse
+import json
+import os
+import re
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from multiprocessing import Event
+from multiprocessing.managers import SyncManager
+
 from flask_bcrypt import Bcrypt
 
 bcrypt = Bcrypt()
 
+CHUNK_SIZE = 64
+REPORT_INTERVAL = 10
+
+# $2b$12$ followed by the 22 character salt and 31 character digest
+BCRYPT_PATTERN = re.compile(r"^\$2[abxy]?\$\d\d\$[./A-Za-z0-9]{53}$")
+
+# Set in each worker process so a match anywhere stops every chunk in flight,
+# and in --hashes mode so every worker skips hashes that are already cracked
+_stop_event = None
+_cracked = None
+
 def check_password(hashed_password, password):
     return bcrypt.check_password_hash(hashed_password, password)
 
-def compare_passwords_from_file(hashed_password, file_path):
-    with open(file_path, 'r') as file:
-        passwords = file.read().splitlines()
-        for password in passwords:
-            if check_password(hashed_password, password):
-                print(f"Match found: {password}")
-            else:
-                print(f"No match found: {password}")
+def _init_worker(stop_event, cracked=None):
+    global _stop_event, _cracked
+    _stop_event = stop_event
+    _cracked = cracked
+    # Ctrl-C is handled by the parent, which sets the stop event for everyone
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def check_chunk(hashed_password, start_line, candidates):
+    """Check one chunk, returning (start_line, lines checked, match or None)."""
+    for checked, password in enumerate(candidates):
+        if _stop_event is not None and _stop_event.is_set():
+            return start_line, checked, None
+        if check_password(hashed_password, password):
+            return start_line, checked + 1, password
+    return start_line, len(candidates), None
+
+def check_chunk_hashes(hashes, start_line, candidates):
+    """Check one chunk against several hashes.
+
+    Returns (start_line, bcrypt checks made, [(hash, password, line), ...]).
+    A hash the bcrypt library rejects is returned with password None so the
+    parent stops queueing it.
+    """
+    remaining = list(hashes)
+    found = []
+    checks = 0
+    for offset, password in enumerate(candidates):
+        if _stop_event.is_set():
+            break
+        for hashed_password in list(remaining):
+            # A dict lookup through the manager is tiny next to one bcrypt call
+            if hashed_password in _cracked:
+                remaining.remove(hashed_password)
+                continue
+            try:
+                matched = check_password(hashed_password, password)
+            except ValueError:
+                found.append((hashed_password, None, start_line + offset))
+                remaining.remove(hashed_password)
+                continue
+            checks += 1
+            if matched:
+                found.append((hashed_password, password, start_line + offset))
+                remaining.remove(hashed_password)
+        if not remaining:
+            break
+    return start_line, checks, found
+
+def read_chunks(file_path, start_line=0, chunk_size=CHUNK_SIZE):
+    # Read the wordlist lazily as bytes so odd encodings in leaked lists survive
+    with open(file_path, "rb") as file:
+        lines = islice(file, start_line, None)
+        line_number = start_line
+        while True:
+            chunk = [line.rstrip(b"\r\n") for line in islice(lines, chunk_size)]
+            if not chunk:
+                return
+            yield line_number, chunk
+            line_number += len(chunk)
+
+def hash_tasks(file_path, remaining, chunk_size=CHUNK_SIZE):
+    # Each task is about chunk_size bcrypt calls and only carries the hashes
+    # still uncracked when it is queued
+    with open(file_path, "rb") as file:
+        lines = (line.rstrip(b"\r\n") for line in file)
+        line_number = 0
+        while remaining:
+            candidates = list(islice(lines, max(1, chunk_size // len(remaining))))
+            if not candidates:
+                return
+            yield check_chunk_hashes, list(remaining), line_number, candidates
+            line_number += len(candidates)
+
+def load_checkpoint(checkpoint_path, hashed_password, file_path):
+    """Return the line to resume from, 0 if there is no matching checkpoint."""
+    if not checkpoint_path or not os.path.isfile(checkpoint_path):
+        return 0
+    with open(checkpoint_path, "r") as file:
+        state = json.load(file)
+    if state.get("hash") != hashed_password or state.get("wordlist") != os.path.abspath(file_path):
+        print(f"[!] Checkpoint '{checkpoint_path}' is for a different hash or wordlist, starting over")
+        return 0
+    return state["line"]
+
+def save_checkpoint(checkpoint_path, hashed_password, file_path, line):
+    state = {"hash": hashed_password, "wordlist": os.path.abspath(file_path), "line": line}
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump(state, file)
+    os.replace(temp_path, checkpoint_path)
+
+def run_streamed(pool, tasks, workers):
+    """Submit (function, *args) tasks lazily and yield results as they finish.
+
+    At most two tasks per worker are queued, so a task generator that reads
+    shared state (a wordlist position, the hashes still uncracked) only runs
+    just before its work is needed. Queued tasks are cancelled on exit.
+    """
+    pending = set()
+    try:
+        while True:
+            while len(pending) < workers * 2:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                pending.add(pool.submit(*task))
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+def compare_passwords_from_file(hashed_password, file_path, workers=None, chunk_size=CHUNK_SIZE, checkpoint_path=None):
+    """Check every line of file_path against hashed_password across a process pool.
+
+    Returns the matching password as bytes, or None.
+    """
+    workers = workers or os.cpu_count() or 1
+    start_line = load_checkpoint(checkpoint_path, hashed_password, file_path)
+    if start_line:
+        print(f"[*] Resuming from line {start_line}")
+
+    stop_event = Event()
+    tasks = (
+        (check_chunk, hashed_password, chunk_start, chunk)
+        for chunk_start, chunk in read_chunks(file_path, start_line, chunk_size)
+    )
+    finished_chunks = {}
+    resume_line = start_line
+    checked = 0
+    match = None
+    started = last_report = time.perf_counter()
+
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stop_event,))
+    try:
+        for chunk_start, count, found in run_streamed(pool, tasks, workers):
+            checked += count
+            finished_chunks[chunk_start] = count
+            if found is not None:
+                match = found
+                break
+
+            # Chunks finish out of order, only checkpoint the fully checked prefix
+            while resume_line in finished_chunks:
+                resume_line += finished_chunks.pop(resume_line)
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, hashed_password, file_path, resume_line)
+
+            now = time.perf_counter()
+            if now - last_report >= REPORT_INTERVAL:
+                print(f"[*] {checked} candidates checked, {checked / (now - started):.1f}/s")
+                last_report = now
+    except KeyboardInterrupt:
+        print(f"\n[!] Interrupted after {checked} candidates, {resume_line} lines fully checked")
+        raise
+    finally:
+        # Workers notice the event between candidates, so this returns quickly
+        stop_event.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"[*] {checked} candidates checked in {elapsed:.1f}s, {checked / elapsed if elapsed else 0:.1f}/s")
+
+    if checkpoint_path and match is not None and os.path.isfile(checkpoint_path):
+        os.remove(checkpoint_path)
+    return match
+
+def bcrypt_cost(hashed_password):
+    # $2b$12$... -> 12
+    return int(hashed_password.split("$")[2])
+
+def load_hashes(file_path):
+    """Read one hash or label:hash per line, returning {hash: label}."""
+    hashes = {}
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            label, _, hashed_password = line.rpartition(":")
+            if not BCRYPT_PATTERN.match(hashed_password):
+                print(f"[!] Skipping line that is not a bcrypt hash: {line}")
+                continue
+            hashes[hashed_password] = label or hashed_password
+    return hashes
+
+def audit_hashes_from_file(hashes, file_path, output, workers=None, chunk_size=CHUNK_SIZE):
+    """Check a wordlist against many bcrypt hashes, cheapest cost factor first.
+
+    hashes maps each hash to a label. Every crack is written to output as one
+    JSON line as soon as it is found. Returns the number cracked.
+    """
+    workers = workers or os.cpu_count() or 1
+    groups = {}
+    for hashed_password in hashes:
+        groups.setdefault(bcrypt_cost(hashed_password), []).append(hashed_password)
+
+    stop_event = Event()
+    manager = SyncManager()
+    manager.start(signal.signal, (signal.SIGINT, signal.SIG_IGN))
+    cracked = manager.dict()
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stop_event, cracked))
+    total_cracked = 0
+    started = time.perf_counter()
+
+    try:
+        for cost in sorted(groups):
+            remaining = dict.fromkeys(groups[cost])
+            group_started = time.perf_counter()
+            checks = 0
+            rejected = 0
+            finished_early = False
+
+            tasks = hash_tasks(file_path, remaining, chunk_size)
+            for _, count, found in run_streamed(pool, tasks, workers):
+                checks += count
+                for hashed_password, password, line_number in found:
+                    if hashed_password not in remaining:
+                        continue
+                    del remaining[hashed_password]
+                    if password is None:
+                        print(f"[!] bcrypt rejected the hash for '{hashes[hashed_password]}', skipping it", file=sys.stderr)
+                        rejected += 1
+                        continue
+                    cracked[hashed_password] = True
+                    total_cracked += 1
+                    output.write(json.dumps({
+                        "label": hashes[hashed_password],
+                        "hash": hashed_password,
+                        "cost": cost,
+                        "password": password.decode("utf-8", errors="replace"),
+                        "line": line_number + 1,
+                    }) + "\n")
+                    output.flush()
+                if not remaining:
+                    finished_early = True
+                    break
+
+            # Chunks still running when the last hash of a group falls are not
+            # waited for, so their checks are missing and the counts are a floor
+            bound = "at least " if finished_early else ""
+            elapsed = time.perf_counter() - group_started
+            print(f"[*] Cost {cost}: {len(groups[cost]) - len(remaining) - rejected}/{len(groups[cost])} cracked, "
+                  f"{bound}{checks} checks in {elapsed:.1f}s, {bound}{checks / elapsed if elapsed else 0:.1f}/s",
+                  file=sys.stderr)
+    finally:
+        stop_event.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        manager.shutdown()
+
+    print(f"[*] {total_cracked}/{len(hashes)} hashes cracked in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return total_cracked
+
+def main():
+    # Replace the defaults with your hashed password and the path to your password file
+    parser = argparse.ArgumentParser(description="Check a wordlist against a bcrypt hash.")
+    parser.add_argument("--hash", default='$2b$12$1AjtrrW2YiCLae5U9SkgSO3VwOeC47xB3EX2pP08NvyUgFz2.q3C.',
+                        help="bcrypt hash to check")
+    parser.add_argument("--wordlist", default="passwords.txt", help="one candidate password per line")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="candidates sent to a worker at a time")
+    parser.add_argument("--checkpoint", metavar="FILE", help="save progress here and resume from it")
+    parser.add_argument("--hashes", metavar="FILE", help="audit every hash (or user:hash) in this file instead")
+    parser.add_argument("--output", metavar="FILE", help="JSON lines results for --hashes (default: stdout)")
+    args = parser.parse_args()
+
+    for path in (args.wordlist, args.hashes):
+        if path and not os.path.isfile(path):
+            print(f"Error: The file '{path}' does not exist.")
+            sys.exit(1)
+
+    if not args.hashes and not BCRYPT_PATTERN.match(args.hash):
+        print(f"Error: '{args.hash}' is not a bcrypt hash.")
+        sys.exit(1)
+
+    if args.hashes:
+        output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+        try:
+            audit_hashes_from_file(load_hashes(args.hashes), args.wordlist, output, args.workers, args.chunk_size)
+        except KeyboardInterrupt:
+            print("\n[!] Interrupted", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        return
+
+    try:
+        match = compare_passwords_from_file(args.hash, args.wordlist, args.workers, args.chunk_size, args.checkpoint)
+    except KeyboardInterrupt:
+        if args.checkpoint:
+            print(f"[*] Run again with --checkpoint {args.checkpoint} to resume")
+        sys.exit(1)
 
-# Replace the following with your hashed password and the path to your password file
-hashed_password = '$2b$12$1AjtrrW2YiCLae5U9SkgSO3VwOeC47xB3EX2pP08NvyUgFz2.q3C.'
-password_file_path = 'passwords.txt'
+    if match is not None:
+        print(f"Match found: {match.decode('utf-8', errors='replace')}")
+    else:
+        print("No match found.")
 
-compare_passwords_from_file(hashed_password, password_file_path)
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,288 @@
+# Reverse DNS lookup of a list of IPs and CIDR ranges
+
+# Usage python ResolveListOfIPs.py [targets ...] [-c 50] [-t 3] [--as-completed] [--server 10.0.0.53]
+#                                  [--cache ptr_cache.db | --no-cache] [--ttl 24]
+# Each target is an IP, a CIDR range such as 10.0.0.0/24, a file with one of
+# those per line, or - for stdin. With no targets, ip_list.txt next to this
+# script is read. Ranges are expanded one address at a time as they are
+# resolved, never as a whole list.
+
+# Lookups run concurrently on a thread pool, each with its own timeout, so a
+# list full of addresses without PTR records no longer costs one full resolver
+# timeout per address in a row. Results are printed in input order unless
+# --as-completed is given. With --server the PTR queries go straight to that DNS
+# server over UDP instead of through the system resolver.
+
+# Results are kept in a persistent cache (see ptrcache.py) for --ttl hours, so a
+# re-run during the same engagement only looks up addresses it has not seen.
+
+import argparse
+import ipaddress
 import os
+import random
 import socket
+import struct
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ptrcache import PtrCache
+
+DEFAULT_CONCURRENCY = 50
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_CACHE = "ptr_cache.db"
+DEFAULT_TTL_HOURS = 24
+
+FAILED = "DNS resolution failed"
+TIMED_OUT = "DNS resolution timed out"
+
+
+def system_resolver(ip):
+    """Resolve ip with the system resolver (hosts file, DNS, ...)."""
+    return socket.gethostbyaddr(ip)[0]
+
+
+def _read_name(message, offset):
+    # Decode a possibly compressed domain name, return (name, offset after it)
+    labels = []
+    end = None
+    for _ in range(128):
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | message[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            return ".".join(labels), end if end is not None else offset
+        labels.append(message[offset:offset + length].decode("ascii", "replace"))
+        offset += length
+    raise ValueError("DNS name loop")
+
+
+def _parse_ptr_response(response):
+    # Return the first PTR name in a DNS response, raise socket.herror if there is none
+    _, flags, qdcount, ancount = struct.unpack(">HHHH", response[:8])
+    if flags & 0x000F:
+        raise socket.herror(1, "Unknown host")
+
+    offset = 12
+    for _ in range(qdcount):
+        offset = _read_name(response, offset)[1] + 4
+    for _ in range(ancount):
+        offset = _read_name(response, offset)[1]
+        rtype, _, _, rdlength = struct.unpack(">HHIH", response[offset:offset + 10])
+        offset += 10
+        if rtype == 12:
+            return _read_name(response, offset)[0]
+        offset += rdlength
+    raise socket.herror(1, "Unknown host")
+
+
+def dns_resolver(server, port=53, timeout=DEFAULT_TIMEOUT):
+    """Return a resolver function that sends PTR queries straight to server.
+
+    Every query waits at most timeout seconds, so the timeout is enforced by
+    the socket itself rather than by abandoning a blocked lookup.
+    """
+    def resolve(ip):
+        query_id = random.getrandbits(16)
+        qname = b"".join(
+            bytes([len(label)]) + label.encode("ascii")
+            for label in ipaddress.ip_address(ip).reverse_pointer.split(".")
+        ) + b"\0"
+        query = struct.pack(">HHHHHH", query_id, 0x0100, 1, 0, 0, 0) + qname + struct.pack(">HH", 12, 1)
+
+        with socket.socket(socket.AF_INET6 if ":" in server else socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect((server, port))
+            sock.send(query)
+            while True:
+                response = sock.recv(4096)
+                if len(response) >= 12 and struct.unpack(">H", response[:2])[0] == query_id:
+                    break
+
+        try:
+            return _parse_ptr_response(response)
+        except (IndexError, struct.error) as e:
+            # A truncated or malformed packet is a failed lookup, not a crash
+            raise socket.herror(2, f"Malformed DNS response: {e}") from None
+
+    return resolve
 
-# get the absolute path of the script's directory
-script_dir = os.path.dirname(os.path.abspath(__file__))
 
-# construct the path to the text file
-filename = "ip_list.txt"
-filepath = os.path.join(script_dir, filename)
+def expand_targets(entries):
+    """Lazily yield every IP in entries, expanding CIDR ranges address by address.
 
-with open(filepath, "r") as file:
-    for ip in file:
-        ip = ip.strip() # remove any newline characters
+    Blank entries and # comments are skipped. Anything that is not a valid
+    range is passed through as is and left for the resolver to reject.
+    """
+    for entry in entries:
+        entry = entry.split("#", 1)[0].strip()
+        if not entry:
+            continue
+        if "/" not in entry:
+            yield entry
+            continue
         try:
-            hostname = socket.gethostbyaddr(ip)[0]
-            print(f"{ip} - {hostname}")
-        except socket.herror:
-            print(f"{ip} - DNS resolution failed")
+            network = ipaddress.ip_network(entry, strict=False)
+        except ValueError:
+            yield entry
+            continue
+        # hosts() skips the network and broadcast addresses and is a generator
+        for address in network.hosts():
+            yield str(address)
+
+
+def read_targets(targets):
+    """Yield the lines of every target file, or the target itself for an IP or range."""
+    for target in targets:
+        if target == "-":
+            yield from sys.stdin
+        elif os.path.isfile(target):
+            with open(target, "r") as file:
+                yield from file
+        else:
+            yield target
+
+
+def resolve_all(ips, resolver=system_resolver, concurrency=DEFAULT_CONCURRENCY,
+                timeout=DEFAULT_TIMEOUT, ordered=True, cache=None):
+    """Yield (ip, hostname, error) for every ip, resolving up to concurrency at once.
+
+    hostname is None when the lookup failed or took longer than timeout,
+    and error then says which. IPs are taken from the iterable lazily. A
+    lookup that times out keeps its thread until the resolver gives up, so it
+    still counts against concurrency until then. With a PtrCache, cached IPs
+    are answered without a lookup and new results are stored in it.
+    """
+    ips = iter(ips)
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    running = {}      # future -> (index, ip, deadline)
+    abandoned = set() # timed out, but the resolver has not returned yet
+    finished = {}     # index -> result, waiting for its turn when ordered
+    next_index = 0
+    submitted = 0
+    exhausted = False
+
+    try:
+        while True:
+            completed = []
+            # Cache hits take no slot, but at most concurrency of them are taken
+            # per round so a fully cached range is still streamed
+            while not exhausted and len(running) + len(abandoned) < concurrency and len(completed) < concurrency:
+                ip = next(ips, None)
+                if ip is None:
+                    exhausted = True
+                    break
+                cached = cache.get(ip) if cache is not None else None
+                if cached is not None:
+                    completed.append((submitted, (ip,) + tuple(cached)))
+                else:
+                    future = pool.submit(resolver, ip)
+                    running[future] = (submitted, ip, time.monotonic() + timeout)
+                submitted += 1
+
+            # Lookups that already timed out are not waited for once nothing is left to submit
+            if not running and not completed and exhausted:
+                break
+
+            done = set()
+            if running:
+                next_deadline = min(deadline for _, _, deadline in running.values())
+                done, _ = wait(
+                    set(running) | abandoned,
+                    timeout=0 if completed else max(next_deadline - time.monotonic(), 0),
+                    return_when=FIRST_COMPLETED,
+                )
+            elif abandoned and not completed:
+                # Every slot is held by a timed out lookup, wait for one to return
+                wait(abandoned, return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for future in list(running):
+                index, ip, deadline = running[future]
+                if future in done:
+                    try:
+                        result = (ip, future.result(), None)
+                    except TimeoutError:
+                        result = (ip, None, TIMED_OUT)
+                    except (OSError, UnicodeError, ValueError):
+                        result = (ip, None, FAILED)
+                elif deadline <= now:
+                    result = (ip, None, TIMED_OUT)
+                    abandoned.add(future)
+                else:
+                    continue
+                del running[future]
+                completed.append((index, result))
+                if cache is not None and result[2] != TIMED_OUT:
+                    cache.put(*result)
+            abandoned = {future for future in abandoned if not future.done()}
+
+            if not ordered:
+                for _, result in completed:
+                    yield result
+                continue
+
+            finished.update(completed)
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reverse DNS lookup of a list of IPs and CIDR ranges.")
+    parser.add_argument("targets", nargs="*", help="IPs, CIDR ranges, files of them or - for stdin (default: ip_list.txt next to this script)")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY, help=f"lookups in flight at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("-t", "--timeout", type=float, default=DEFAULT_TIMEOUT, help=f"seconds to wait for each lookup (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--as-completed", action="store_true", help="print results as they arrive instead of in input order")
+    parser.add_argument("--server", help="send PTR queries straight to this DNS server, HOST or HOST:PORT")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help=f"persistent result cache (default: {DEFAULT_CACHE})")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the result cache")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL_HOURS, help=f"hours a cached result stays valid (default: {DEFAULT_TTL_HOURS})")
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        print("Error: --concurrency must be at least 1.")
+        raise SystemExit(1)
+
+    resolver = system_resolver
+    if args.server:
+        host, port = args.server, 53
+        if host.count(":") == 1:
+            host, port = host.split(":")
+        resolver = dns_resolver(host, int(port), args.timeout)
+
+    targets = args.targets
+    if not targets:
+        # get the absolute path of the script's directory
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+
+        # construct the path to the text file
+        filename = "ip_list.txt"
+        targets = [os.path.join(script_dir, filename)]
+        if not os.path.isfile(targets[0]):
+            print(f"Error: No targets given and '{targets[0]}' does not exist.")
+            raise SystemExit(1)
+
+    cache = None if args.no_cache else PtrCache(args.cache, args.ttl * 3600)
+    try:
+        ips = expand_targets(read_targets(targets))
+        results = resolve_all(ips, resolver, args.concurrency, args.timeout, not args.as_completed, cache)
+        for ip, hostname, error in results:
+            print(f"{ip} - {hostname or error}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if cache is not None:
+            cache.close()
+            print(f"[+] Cache: {cache.hits} hits, {cache.misses} misses, "
+                  f"{cache.evicted} expired entries evicted", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
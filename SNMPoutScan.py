@@ -1,33 +1,217 @@
+# Flags lines of an SNMP walk that contain potentially useful data
+
+# Usage python SNMPoutScan.py [walk.txt | -] [--keywords keywords.txt] [--follow]
+#       snmpwalk -v2c -c public 10.0.0.1 | python SNMPoutScan.py
+# Lines are read and reported one at a time, so a walk can be piped in while it
+# is still running. --follow keeps watching a walk file that is still being
+# written, like tail -f. With no file and nothing piped in, prompts for a path.
+# A keywords file has one keyword per line, anything after a # is ignored.
+
+# Given a directory, every walk file in it is scanned across a process pool and
+# the hits are grouped per device (the file name) by OID subtree, followed by a
+# summary table of which devices leak community strings, users or software.
+#       python SNMPoutScan.py walks/ [--processes 8] [--quiet]
+
+import argparse
 import re
 import os
+import sys
+import time
+from functools import partial
+from multiprocessing import Pool
+
+FOLLOW_INTERVAL = 0.5
+
+# List of common SNMP OIDs or keywords that are often useful
+DEFAULT_KEYWORDS = [
+    'sysContact', 'sysName', 'sysLocation',    # System information
+    'ifDescr', 'ifName', 'ifAlias',            # Interface descriptions
+    'hrSWRunName', 'hrSWInstalledName',        # Running/installed software
+    'dot1qVlanFdbId',                          # VLAN information
+    'dot1dBasePortIfIndex',                    # Port and interface index
+    'cisco', 'secret', 'community', 'auth',    # Cisco-specific and auth-related
+    'loginUserName', 'userPassword',           # Usernames and passwords
+    'private', 'shadow', 'passwd',             # Files that may contain sensitive data
+    'ntpAssocPeer', 'ntpAssocAddr',            # NTP association details
+    'snmpEnableAuthenTraps',                   # SNMP trap settings
+    'hrSystemDate', 'hrSystemUptime',          # System uptime and date
+]
+
+def load_keywords(file_path):
+    """Read keywords from file_path, one per line, skipping blanks and # comments."""
+    keywords = []
+    with open(file_path, 'r') as file:
+        for line in file:
+            keyword = line.split('#', 1)[0].strip()
+            if keyword:
+                keywords.append(keyword)
+    return keywords
+
+class KeywordMatcher:
+    """Case-insensitive search for any of a set of keywords in one regex pass.
+
+    The keywords are lowercased and compiled into a single alternation, longest
+    first, and each line is lowercased once before searching. That is much
+    cheaper than a re.IGNORECASE search per keyword, or even one IGNORECASE
+    alternation.
+    """
+
+    def __init__(self, keywords=DEFAULT_KEYWORDS):
+        # Map each lowercased keyword back to how it was written
+        self.keywords = {}
+        for keyword in keywords:
+            self.keywords.setdefault(keyword.lower(), keyword)
+        if not self.keywords:
+            raise ValueError("no keywords to match")
+        alternatives = sorted(self.keywords, key=len, reverse=True)
+        self.pattern = re.compile("|".join(map(re.escape, alternatives)))
+
+    def match(self, line):
+        """Return the first keyword found in line, or None."""
+        found = self.pattern.search(line.lower())
+        return self.keywords[found.group()] if found else None
+
+DEFAULT_MATCHER = KeywordMatcher()
+
+# Subtrees hits are grouped by: name, numeric OID prefix and the objects in it
+# as they appear in symbolic walk output (SNMPv2-MIB::sysName.0)
+OID_SUBTREES = [
+    ('system', '1.3.6.1.2.1.1', ['sysDescr', 'sysObjectID', 'sysUpTime', 'sysContact', 'sysName', 'sysLocation', 'sysServices', 'sysORTable', 'sysOREntry', 'sysORID', 'sysORDescr', 'sysORUpTime']),
+    ('interfaces', '1.3.6.1.2.1.2', ['ifNumber', 'ifIndex', 'ifDescr', 'ifType', 'ifMtu', 'ifSpeed', 'ifPhysAddress', 'ifAdminStatus', 'ifOperStatus', 'ifLastChange', 'ifInOctets', 'ifOutOctets']),
+    ('interfaces', '1.3.6.1.2.1.31', ['ifName', 'ifAlias', 'ifHighSpeed', 'ifHCInOctets', 'ifHCOutOctets']),
+    ('ip', '1.3.6.1.2.1.4', ['ipForwarding', 'ipAdEntAddr', 'ipAdEntIfIndex', 'ipAdEntNetMask', 'ipRouteDest', 'ipRouteNextHop', 'ipNetToMediaPhysAddress', 'ipNetToMediaNetAddress']),
+    ('tcp', '1.3.6.1.2.1.6', ['tcpConnState', 'tcpConnLocalAddress', 'tcpConnLocalPort', 'tcpConnRemAddress', 'tcpConnRemPort']),
+    ('udp', '1.3.6.1.2.1.7', ['udpLocalAddress', 'udpLocalPort']),
+    ('snmp', '1.3.6.1.2.1.11', ['snmpInPkts', 'snmpInBadCommunityNames', 'snmpEnableAuthenTraps']),
+    ('bridge', '1.3.6.1.2.1.17', ['dot1dBaseBridgeAddress', 'dot1dBasePortIfIndex', 'dot1dTpFdbAddress', 'dot1dTpFdbPort']),
+    ('vlan', '1.3.6.1.2.1.17.7', ['dot1qVlanFdbId', 'dot1qVlanStaticName', 'dot1qTpFdbPort']),
+    ('hrSystem', '1.3.6.1.2.1.25.1', ['hrSystemUptime', 'hrSystemDate', 'hrSystemInitialLoadParameters', 'hrSystemNumUsers', 'hrSystemProcesses']),
+    ('hrStorage', '1.3.6.1.2.1.25.2', ['hrMemorySize', 'hrStorageIndex', 'hrStorageType', 'hrStorageDescr', 'hrStorageSize', 'hrStorageUsed']),
+    ('hrDevice', '1.3.6.1.2.1.25.3', ['hrDeviceDescr', 'hrDeviceType', 'hrProcessorLoad', 'hrFSMountPoint']),
+    ('hrSWRun', '1.3.6.1.2.1.25.4', ['hrSWOSIndex', 'hrSWRunIndex', 'hrSWRunName', 'hrSWRunID', 'hrSWRunPath', 'hrSWRunParameters', 'hrSWRunType', 'hrSWRunStatus']),
+    ('hrSWInstalled', '1.3.6.1.2.1.25.6', ['hrSWInstalledLastChange', 'hrSWInstalledIndex', 'hrSWInstalledName', 'hrSWInstalledID', 'hrSWInstalledType', 'hrSWInstalledDate']),
+    ('ntp', '1.3.6.1.2.1.197', ['ntpAssocPeer', 'ntpAssocAddr', 'ntpAssocName', 'ntpAssocRefId']),
+    ('enterprises', '1.3.6.1.4.1', []),
+    ('cisco', '1.3.6.1.4.1.9', []),
+    ('snmpCommunity', '1.3.6.1.6.3.18', ['snmpCommunityName', 'snmpCommunitySecurityName', 'snmpCommunityContextName']),
+    ('usmUser', '1.3.6.1.6.3.15', ['usmUserName', 'usmUserSecurityName', 'usmUserAuthProtocol', 'usmUserPrivProtocol']),
+]
+
+# Symbolic OIDs for objects not listed above are grouped by their MIB
+MODULE_SUBTREES = {
+    'SNMPv2-MIB': 'system', 'RFC1213-MIB': 'system', 'IF-MIB': 'interfaces',
+    'IP-MIB': 'ip', 'IP-FORWARD-MIB': 'ip', 'TCP-MIB': 'tcp', 'UDP-MIB': 'udp',
+    'BRIDGE-MIB': 'bridge', 'Q-BRIDGE-MIB': 'vlan', 'NTPv4-MIB': 'ntp',
+    'HOST-RESOURCES-MIB': 'hostResources', 'SNMP-COMMUNITY-MIB': 'snmpCommunity',
+    'SNMP-USER-BASED-SM-MIB': 'usmUser',
+}
+
+# Symbolic roots net-snmp prints for OIDs it has no MIB for
+# (SNMPv2-SMI::enterprises.9.2.1.3.0), the arcs after them are numeric
+SYMBOLIC_ROOTS = {
+    'iso': '1',
+    'mib-2': '1.3.6.1.2.1',
+    'enterprises': '1.3.6.1.4.1',
+    'snmpModules': '1.3.6.1.6.3',
+}
+
+# What a hit leaks, from the keyword that matched or else from its subtree
+KEYWORD_CATEGORIES = {
+    'community': 'community', 'secret': 'community', 'private': 'community',
+    'loginUserName': 'users', 'userPassword': 'users', 'passwd': 'users', 'shadow': 'users',
+    'hrSWRunName': 'software', 'hrSWInstalledName': 'software',
+}
+SUBTREE_CATEGORIES = {
+    'snmpCommunity': 'community', 'usmUser': 'users',
+    'hrSWRun': 'software', 'hrSWInstalled': 'software',
+}
+CATEGORIES = ['community', 'users', 'software']
+
+class OidIndex:
+    """Map the OID of a walk line to the subtree it belongs to.
+
+    Numeric OIDs (.1.3.6.1.2.1.1.5.0 or iso.3.6.1.2.1.1.5.0) are split into
+    their arcs and matched against the longest known prefix with one dict
+    lookup per prefix length. Symbolic OIDs (SNMPv2-MIB::sysName.0) are looked
+    up by object name, then by MIB. Symbolic roots followed by numeric arcs
+    (SNMPv2-SMI::enterprises.9.2.1.3.0) are expanded and matched like numeric
+    OIDs.
+    """
+
+    def __init__(self, subtrees=OID_SUBTREES, modules=MODULE_SUBTREES, roots=SYMBOLIC_ROOTS):
+        self.roots = {name: prefix.split('.') for name, prefix in roots.items()}
+        self.prefixes = {}
+        self.objects = {}
+        for name, prefix, objects in subtrees:
+            self.prefixes[tuple(prefix.split('.'))] = name
+            for obj in objects:
+                self.objects[obj] = name
+        self.modules = modules
+        self.depths = sorted({len(prefix) for prefix in self.prefixes}, reverse=True)
+
+    def subtree(self, line):
+        """Return the subtree name for a walk line, 'other' when it is unknown."""
+        oid = line.split(' ', 1)[0]
+        module, sep, name = oid.partition('::')
+        if sep:
+            obj, _, rest = name.partition('.')
+            subtree = self.objects.get(obj)
+            if subtree:
+                return subtree
+            if obj not in self.roots:
+                return self.modules.get(module, 'other')
+            arcs = [obj] + rest.split('.', self.depths[0])
+        else:
+            # Only the arcs that can be part of a known prefix are split off
+            arcs = oid.lstrip('.').split('.', self.depths[0])
+        if arcs[0] in self.roots:
+            arcs = self.roots[arcs[0]] + arcs[1:]
+        for depth in self.depths:
+            name = self.prefixes.get(tuple(arcs[:depth]))
+            if name:
+                return name
+        return 'other'
+
+DEFAULT_OID_INDEX = OidIndex()
 
 # Function to check if a line contains potentially useful SNMP data
-def is_interesting(line):
-    # List of common SNMP OIDs or keywords that are often useful
-    keywords = [
-        'sysContact', 'sysName', 'sysLocation',    # System information
-        'ifDescr', 'ifName', 'ifAlias',            # Interface descriptions
-        'hrSWRunName', 'hrSWInstalledName',        # Running/installed software
-        'dot1qVlanFdbId',                          # VLAN information
-        'dot1dBasePortIfIndex',                    # Port and interface index
-        'cisco', 'secret', 'community', 'auth',    # Cisco-specific and auth-related
-        'loginUserName', 'userPassword',           # Usernames and passwords
-        'private', 'shadow', 'passwd',             # Files that may contain sensitive data
-        'ntpAssocPeer', 'ntpAssocAddr',            # NTP association details
-        'snmpEnableAuthenTraps',                   # SNMP trap settings
-        'hrSystemDate', 'hrSystemUptime',          # System uptime and date
-    ]
-    
-    for keyword in keywords:
-        if re.search(keyword, line, re.IGNORECASE):
-            return True
-    return False
-
-# Function to parse the SNMP walk output
-def parse_snmp_walk(file_path):
+def is_interesting(line, matcher=DEFAULT_MATCHER):
+    return matcher.match(line) is not None
+
+# Yield (keyword, line) for every interesting line, without holding the input
+def scan_lines(lines, matcher=DEFAULT_MATCHER):
+    for line in lines:
+        keyword = matcher.match(line)
+        if keyword:
+            yield keyword, line.strip()
+
+def follow_lines(file, interval=FOLLOW_INTERVAL):
+    """Yield complete lines from file, waiting for more at the end like tail -f.
+
+    A partial last line is held back until the rest of it is written. If the
+    file is truncated, reading starts again from the top.
+    """
+    partial = ""
+    while True:
+        line = file.readline()
+        if not line:
+            if os.fstat(file.fileno()).st_size < file.tell():
+                file.seek(0)
+                partial = ""
+            time.sleep(interval)
+            continue
+        if not line.endswith("\n"):
+            partial += line
+            continue
+        yield partial + line
+        partial = ""
+
+# Function to parse the SNMP walk output, returns the interesting lines stripped
+# (use scan_lines() to also get the keyword that matched)
+def parse_snmp_walk(file_path, matcher=DEFAULT_MATCHER):
     try:
         with open(file_path, 'r') as file:
-            lines = file.readlines()
+            return [line for _, line in scan_lines(file, matcher)]
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found.")
         return []
@@ -35,25 +219,131 @@ def parse_snmp_walk(file_path):
         print(f"An error occurred while reading the file: {e}")
         return []
 
-    interesting_data = []
-    for line in lines:
-        if is_interesting(line):
-            interesting_data.append(line.strip())
+def find_walk_files(directory):
+    """Return the sorted paths of the walk files directly inside directory."""
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if not name.startswith('.') and os.path.isfile(os.path.join(directory, name))
+    )
+
+def scan_device(file_path, matcher=DEFAULT_MATCHER, oid_index=DEFAULT_OID_INDEX):
+    """Scan one device's walk, returns (device, {subtree: [(keyword, line)]}, error).
+
+    Runs in a worker process in directory mode. The device is the file name
+    without its extension. Lines in a subtree that leaks something (running
+    software, community or user tables) are kept even without a keyword, since
+    numeric walks never contain the object names; their keyword is the subtree.
+    """
+    device = os.path.splitext(os.path.basename(file_path))[0]
+    groups = {}
+    try:
+        with open(file_path, 'r', errors='replace') as file:
+            for line in file:
+                keyword = matcher.match(line)
+                subtree = oid_index.subtree(line)
+                if not keyword:
+                    if subtree not in SUBTREE_CATEGORIES:
+                        continue
+                    keyword = subtree
+                groups.setdefault(subtree, []).append((keyword, line.strip()))
+    except OSError as e:
+        return device, {}, str(e)
+    return device, groups, None
 
-    return interesting_data
+def device_categories(groups):
+    """Return the set of categories (community, users, software) a device leaks."""
+    found = set()
+    for subtree, hits in groups.items():
+        category = SUBTREE_CATEGORIES.get(subtree)
+        if category:
+            found.add(category)
+        for keyword, _ in hits:
+            category = KEYWORD_CATEGORIES.get(keyword)
+            if category:
+                found.add(category)
+    return found
+
+def scan_directory(directory, matcher=DEFAULT_MATCHER, processes=None):
+    """Scan every walk file in directory across a process pool, in file order."""
+    file_paths = find_walk_files(directory)
+    if not file_paths:
+        return []
+    with Pool(min(processes or os.cpu_count() or 1, len(file_paths))) as pool:
+        return pool.map(partial(scan_device, matcher=matcher), file_paths)
+
+def report_devices(results, quiet=False):
+    rows = []
+    for device, groups, error in results:
+        if error:
+            print(f"[!] Skipping '{device}': {error}")
+            continue
+        if not groups:
+            continue
+        rows.append((device, sum(len(hits) for hits in groups.values()), device_categories(groups), sorted(groups)))
+        if quiet:
+            continue
+        print(f"\n{device}")
+        for subtree in sorted(groups):
+            print(f"  {subtree} ({len(groups[subtree])})")
+            for keyword, line in groups[subtree]:
+                print(f"    [{keyword}] {line}")
+
+    if not rows:
+        print("No interesting data found.")
+        return
+
+    width = max(len("Device"), max(len(row[0]) for row in rows))
+    print(f"\n{'Device':<{width}}  {'Hits':>7}  {'Community':<9}  {'Users':<5}  {'Software':<8}  Subtrees")
+    for device, hits, categories, subtrees in rows:
+        flags = ["yes" if category in categories else "-" for category in CATEGORIES]
+        print(f"{device:<{width}}  {hits:>7}  {flags[0]:<9}  {flags[1]:<5}  {flags[2]:<8}  {', '.join(subtrees)}")
+
+def report(lines, matcher=DEFAULT_MATCHER):
+    # Print each hit as soon as it is found, flushed so piped output keeps up
+    found = False
+    for keyword, line in scan_lines(lines, matcher):
+        if not found:
+            print("Found potentially useful SNMP data:")
+            found = True
+        print(f"[{keyword}] {line}", flush=True)
+    if not found:
+        print("No interesting data found.")
 
 # Main execution
 if __name__ == "__main__":
-    snmp_walk_output_file = input("Please enter the path to the SNMP walk output file: ")
+    parser = argparse.ArgumentParser(description="Flag potentially useful lines in an SNMP walk.")
+    parser.add_argument("file", nargs="?", help="SNMP walk output file or directory of walks, - or omitted to read piped input")
+    parser.add_argument("--keywords", help="file with one keyword per line, replaces the built-in list")
+    parser.add_argument("-f", "--follow", action="store_true", help="keep reading as the file grows, like tail -f")
+    parser.add_argument("-p", "--processes", type=int, help="worker processes for a directory of walks (default: CPU count)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="directory mode: only print the summary table")
+    args = parser.parse_args()
 
-    if not os.path.isfile(snmp_walk_output_file):
-        print(f"Error: The file '{snmp_walk_output_file}' does not exist or is not accessible.")
-    else:
-        interesting_lines = parse_snmp_walk(snmp_walk_output_file)
+    matcher = DEFAULT_MATCHER
+    if args.keywords:
+        try:
+            matcher = KeywordMatcher(load_keywords(args.keywords))
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not load keywords from '{args.keywords}': {e}")
+            raise SystemExit(1)
 
-        if interesting_lines:
-            print("Found potentially useful SNMP data:")
-            for line in interesting_lines:
-                print(line)
+    snmp_walk_output_file = args.file
+    if snmp_walk_output_file is None and sys.stdin.isatty():
+        snmp_walk_output_file = input("Please enter the path to the SNMP walk output file: ")
+
+    try:
+        if snmp_walk_output_file in (None, "-"):
+            if args.follow:
+                print("Error: --follow needs a file, piped input is already read as it arrives.")
+                raise SystemExit(1)
+            report(sys.stdin, matcher)
+        elif os.path.isdir(snmp_walk_output_file):
+            report_devices(scan_directory(snmp_walk_output_file, matcher, args.processes), args.quiet)
+        elif not os.path.isfile(snmp_walk_output_file):
+            print(f"Error: The file '{snmp_walk_output_file}' does not exist or is not accessible.")
         else:
-            print("No interesting data found.")
+            with open(snmp_walk_output_file, 'r') as file:
+                report(follow_lines(file) if args.follow else file, matcher)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,102 @@
+# Benchmark for docxheadings.py against the original per-paragraph extractors
+
+# Usage python bench_docxheadings.py [--findings 400] [--instances 12] [--body 4] [--keep report.docx]
+# Generates a report with python-docx (Heading 2 sections, Heading 3 findings,
+# Heading 4 instances, body paragraphs and a table per finding), then times
+# the two walks the old Extract_and_Count_Word_Headers.py made over it against
+# one extract() call with each backend, and checks all give the same lines.
+# Last it nests every heading level into a tree, which should cost about the
+# same as reading two levels since it is still one pass.
+
+import argparse
+import os
+import tempfile
+import time
+
+from docx import Document
+
+from docxheadings import (BACKENDS, extract, findings_and_instances_lines, finding_count_lines,
+                          heading_tree, iter_headings)
+
+
+def generate_report(path, findings, instances, body):
+    document = Document()
+    document.add_heading("Penetration Test Report", 1)
+    for finding in range(findings):
+        if finding % 25 == 0:
+            document.add_heading(f"Section {finding // 25}", 2)
+        document.add_heading(f"Finding {finding}: SMB Signing Not Required {finding % 40}", 3)
+        for instance in range(instances):
+            document.add_heading(f"10.0.{finding % 256}.{instance}", 4)
+            for _ in range(body):
+                document.add_paragraph("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4)
+        table = document.add_table(rows=3, cols=3)
+        for cell in table._cells:
+            cell.text = "cell text"
+    document.save(path)
+
+
+def legacy_extract(docx_path):
+    # The two passes the original script made, each loading the document and
+    # resolving para.style.name for every paragraph
+    lines = []
+    for para in Document(docx_path).paragraphs:
+        style = para.style.name
+        text = para.text.strip()
+        if style == 'Heading 3' and text:
+            lines.append('\n' + text)
+        elif style == 'Heading 4' and text:
+            lines.append(text)
+
+    counts = []
+    paragraphs = Document(docx_path).paragraphs
+    title = None
+    for para in paragraphs:
+        style = para.style.name
+        text = para.text.strip()
+        if style == 'Heading 3':
+            if title is not None:
+                counts.append(f"{title}\t{count}")
+            title = text or None
+            count = 0
+        elif style == 'Heading 4' and text and title is not None:
+            count += 1
+    if title is not None:
+        counts.append(f"{title}\t{count}")
+    return lines, counts
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time docxheadings.extract() against the original extractors.")
+    parser.add_argument("--findings", type=int, default=400, help="Heading 3 findings (default: 400)")
+    parser.add_argument("--instances", type=int, default=12, help="Heading 4 instances per finding (default: 12)")
+    parser.add_argument("--body", type=int, default=4, help="body paragraphs per instance (default: 4)")
+    parser.add_argument("--keep", metavar="DOCX", help="write the generated report here instead of a temp file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.keep or os.path.join(tmp, "report.docx")
+        _, seconds = timed(generate_report, path, args.findings, args.instances, args.body)
+        paragraphs = len(Document(path).paragraphs)
+        print(f"[*] Generated {paragraphs} paragraphs ({os.path.getsize(path)} bytes) in {seconds:.1f}s")
+
+        (legacy_lines, legacy_counts), legacy_seconds = timed(legacy_extract, path)
+        print(f"[*] Original two passes: {legacy_seconds:.2f}s")
+        for backend in BACKENDS:
+            extraction, seconds = timed(extract, path, backend)
+            same = (legacy_lines == findings_and_instances_lines(extraction)
+                    and legacy_counts == finding_count_lines(extraction))
+            print(f"[*] extract(backend={backend!r}): {seconds:.2f}s ({legacy_seconds / seconds:.1f}x), "
+                  f"output identical: {'yes' if same else 'NO'}")
+        tree, seconds = timed(lambda: heading_tree(iter_headings(path, range(1, 10))))
+        print(f"[*] heading_tree(levels 1-9): {seconds:.2f}s, {sum(tree['counts'].values())} headings")
+
+
+if __name__ == "__main__":
+    main()
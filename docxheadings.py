@@ -0,0 +1,386 @@
+# Heading extraction engine for Word (.docx) reports
+# Shared by Extract_Word_Headers.py, Extract_Word_Headers_Count_Instances.py
+# and Extract_and_Count_Word_Headers.py so a report is loaded and walked once
+
+# python-docx resolves para.style by searching the styles part for every
+# paragraph, which is most of the cost on a long report. Here the paragraph
+# style ids that are headings are looked up once, and each paragraph is checked
+# by its w:pStyle id. Text is only pulled from the heading paragraphs.
+
+# Paragraphs are read in document order wherever they sit in the flow: in the
+# body, in table cells (nested tables too) and in block content controls
+# (w:sdt). Runs inside inline content controls count towards a paragraph's
+# text. Paragraphs in text boxes are not part of the flow and are skipped.
+
+# Two backends read the document. "xml" (the default) opens the .docx as a zip
+# and streams word/document.xml with iterparse, clearing each body element once
+# it is read, so memory stays flat however many screenshots a report embeds and
+# python-docx is not needed. "docx" loads the report with python-docx. Both map
+# styles with style_levels() and give identical output.
+
+# A style is a heading when its name is "Heading N" in English or a localized
+# Word (Überschrift 3, Titre 3, Kop 3, ...), including the linked "Heading 3
+# Char" style, or when it is based on such a style, like a custom "Finding
+# Title" based on Heading 3.
+
+# Findings are Heading 3 paragraphs and their instances the non-empty Heading 4
+# paragraphs that follow, up to the next Heading 3 or higher. Any other set of
+# levels can be read with iter_headings() and nested with heading_tree(), which
+# counts the headings at every level under each node.
+
+# Usage
+#   from docxheadings import extract
+#   extraction = extract("report.docx")              # or backend="docx"
+#   for level, text in extraction.headings:
+#       print(level, text)
+#   for title, instances in extraction.findings:
+#       print(title, len(instances))
+#
+#   from docxheadings import heading_tree, iter_headings, parse_levels
+#   tree = heading_tree(iter_headings("report.docx", parse_levels("1-4")))
+#   print(tree["counts"])                            # {1: 1, 2: 6, 3: 40, 4: 310}
+#
+#   from docxheadings import find_reports, report_properties
+#   for path in find_reports("reports/"):
+#       print(path, report_properties(path).modified)
+
+import os
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import namedtuple
+
+# Bump when a change alters what extract() returns, cached results are keyed on it
+ENGINE_VERSION = 2
+
+FINDING_LEVEL = 3
+INSTANCE_LEVEL = 4
+LEVELS = (FINDING_LEVEL, INSTANCE_LEVEL)
+BACKENDS = ("xml", "docx")
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+STYLES_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+CORE_PROPERTIES_REL = "http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties"
+DC = "{http://purl.org/dc/elements/1.1/}"
+DCTERMS = "{http://purl.org/dc/terms/}"
+
+# Built-in heading style names in English and localized Word installs
+HEADING_NAME = re.compile(
+    r"(?:heading|überschrift|titre|título|titolo|kop|rubrik|overskrift|otsikko|nagłówek|nadpis|заголовок)"
+    r" ?(\d)(?: char)?",
+    re.IGNORECASE,
+)
+
+# Elements whose w:p children are part of the document flow: tables, block
+# content controls and custom XML. Anything else, like a text box inside a run,
+# hides the paragraphs below it.
+BLOCK_CONTAINERS = frozenset(W + tag for tag in ("tbl", "tr", "tc", "sdt", "sdtContent", "customXml"))
+# Elements inside a w:p whose runs are part of its text
+INLINE_CONTAINERS = frozenset(W + tag for tag in ("hyperlink", "sdt", "sdtContent"))
+
+# What reading a missing, corrupt or non-.docx file can raise
+READ_ERRORS = (OSError, zipfile.BadZipFile, ET.ParseError, KeyError, ValueError)
+
+# Text equivalents of run content, as python-docx gives them in Paragraph.text
+RUN_TEXT = {W + "tab": "\t", W + "ptab": "\t", W + "cr": "\n", W + "noBreakHyphen": "-"}
+
+# headings: (level, text) for every non-empty heading, in document order
+# findings: (title, [instance text, ...]) for every non-empty Heading 3, when
+# FINDING_LEVEL and INSTANCE_LEVEL were read
+Extraction = namedtuple("Extraction", ["headings", "findings"])
+
+# From docProps/core.xml, "" when not set. Dates are as stored, e.g. 2025-03-14T09:30:00Z
+ReportProperties = namedtuple("ReportProperties", ["title", "author", "created", "modified"])
+
+
+def style_levels(styles, levels=LEVELS):
+    """Map the w:style elements of styles.xml to heading levels.
+
+    Returns ({style id: level or None}, level of the default paragraph style).
+    Works on ElementTree and python-docx (lxml) elements alike.
+    """
+    names = {}
+    bases = {}
+    default_id = None
+    for style in styles:
+        style_id = style.get(W + "styleId")
+        # The last default paragraph style wins, as the spec says
+        if style.get(W + "type", "paragraph") == "paragraph" and style.get(W + "default") in ("1", "true", "on"):
+            default_id = style_id
+        # and the first style with a given id
+        if style_id in names:
+            continue
+        name = style.find(W + "name")
+        names[style_id] = name.get(W + "val", "") if name is not None else ""
+        based_on = style.find(W + "basedOn")
+        if based_on is not None:
+            bases[style_id] = based_on.get(W + "val")
+
+    def level_of(style_id):
+        # Follow basedOn until a heading name turns up, at most once round a loop
+        seen = set()
+        while style_id in names and style_id not in seen:
+            seen.add(style_id)
+            match = HEADING_NAME.fullmatch(names[style_id].strip())
+            if match:
+                return int(match.group(1))
+            style_id = bases.get(style_id)
+        return None
+
+    mapping = {}
+    for style_id in names:
+        level = level_of(style_id)
+        mapping[style_id] = level if level in levels else None
+    return mapping, mapping.get(default_id)
+
+
+def parse_levels(spec):
+    """Parse a level list like "1-4" or "2,3,5" into a sorted tuple of levels."""
+    levels = set()
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        if not first.isdigit() or (last and not last.isdigit()):
+            raise ValueError(f"invalid heading levels {spec!r}, expected e.g. 3-4 or 1,2,4")
+        levels.update(range(int(first), int(last or first) + 1))
+    if not levels:
+        raise ValueError(f"invalid heading levels {spec!r}, expected e.g. 3-4 or 1,2,4")
+    if not levels <= set(range(1, 10)):
+        raise ValueError(f"invalid heading levels {spec!r}, Word has heading levels 1 to 9")
+    return tuple(sorted(levels))
+
+
+def block_paragraphs(parent):
+    """Yield the w:p elements of the document flow under parent, in order.
+
+    Works on ElementTree and python-docx (lxml) elements alike.
+    """
+    for child in parent:
+        if child.tag == W + "p":
+            yield child
+        elif child.tag in BLOCK_CONTAINERS:
+            yield from block_paragraphs(child)
+
+
+def _iter_headings_docx(docx_path, levels):
+    from docx import Document
+
+    document = Document(docx_path)
+    mapping, default_level = style_levels(document.styles.element.iterchildren(W + "style"), levels)
+    for p in block_paragraphs(document.element.body):
+        # A missing or unknown style id falls back to the default style, as in python-docx
+        level = mapping.get(paragraph_style(p), default_level)
+        if level is not None:
+            yield level, paragraph_text(p).strip()
+
+
+def _part_path(package, source, rel_type):
+    # Path inside the zip of the part source points to with rel_type, or None
+    folder, name = posixpath.split(source)
+    rels_path = posixpath.join(folder, "_rels", name + ".rels")
+    try:
+        rels = ET.fromstring(package.read(rels_path))
+    except KeyError:
+        return None
+    for rel in rels.iter(REL + "Relationship"):
+        if rel.get("Type") == rel_type and rel.get("TargetMode") != "External":
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target[1:]
+            return posixpath.normpath(posixpath.join(folder, target))
+    return None
+
+
+def paragraph_style(p):
+    """Return the w:pStyle id of a w:p element, or None."""
+    style = p.find(W + "pPr/" + W + "pStyle")
+    return style.get(W + "val") if style is not None else None
+
+
+def _runs(parent):
+    for child in parent:
+        if child.tag == W + "r":
+            yield child
+        elif child.tag in INLINE_CONTAINERS:
+            yield from _runs(child)
+
+
+def paragraph_text(p):
+    """Text of a w:p element the way python-docx builds Paragraph.text, plus
+    the runs of inline content controls.
+
+    Tracked insertions and fields are left out as they are in python-docx.
+    """
+    parts = []
+    for run in _runs(p):
+        for item in run:
+            tag = item.tag
+            if tag == W + "t":
+                parts.append(item.text or "")
+            elif tag == W + "br":
+                # Page and column breaks have no text, line breaks are newlines
+                if item.get(W + "type", "textWrapping") == "textWrapping":
+                    parts.append("\n")
+            elif tag in RUN_TEXT:
+                parts.append(RUN_TEXT[tag])
+    return "".join(parts)
+
+
+def _iter_headings_xml(docx_path, levels):
+    with zipfile.ZipFile(docx_path) as package:
+        document_path = _part_path(package, "", OFFICE_DOCUMENT_REL) or "word/document.xml"
+        styles_path = _part_path(package, document_path, STYLES_REL)
+        mapping, default_level = {}, None
+        if styles_path:
+            styles = ET.fromstring(package.read(styles_path))
+            mapping, default_level = style_levels(styles.iterfind(W + "style"), levels)
+
+        with package.open(document_path) as xml:
+            depth = 0
+            body = None
+            # For each open element below w:body, whether it hides the paragraphs
+            # in it from the flow, as block_paragraphs() decides
+            hiding = []
+            hidden = 0
+            for event, elem in ET.iterparse(xml, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 2 and elem.tag == W + "body":
+                        body = elem
+                    elif depth > 2 and body is not None:
+                        hides = elem.tag not in BLOCK_CONTAINERS
+                        hiding.append(hides)
+                        hidden += hides
+                    continue
+                depth -= 1
+                # w:document > w:body > ... > element
+                if depth < 2 or body is None:
+                    continue
+                hidden -= hiding.pop()
+                if elem.tag == W + "p" and not hidden:
+                    level = mapping.get(paragraph_style(elem), default_level)
+                    if level is not None:
+                        yield level, paragraph_text(elem).strip()
+                    # A paragraph in a table is dropped as soon as it is read
+                    elem.clear()
+                if depth == 2:
+                    # and each body element once it ends
+                    body.clear()
+
+
+def iter_headings(docx_path, levels=LEVELS, backend="xml"):
+    """Yield (level, text) for each heading paragraph at one of levels, in
+    document order.
+
+    Empty headings are yielded too, with their text stripped to "", since an
+    empty Heading 3 still ends the finding before it.
+    """
+    if backend == "docx":
+        return _iter_headings_docx(docx_path, levels)
+    if backend == "xml":
+        return _iter_headings_xml(docx_path, levels)
+    raise ValueError(f"unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+
+def collect(headings):
+    """Build an Extraction from (level, text) pairs in a single pass."""
+    found = []
+    findings = []
+    instances = None
+    for level, text in headings:
+        if level <= FINDING_LEVEL:
+            # Any Heading 3 or higher closes the open finding, an empty one opens none
+            instances = None
+            if level == FINDING_LEVEL and text:
+                instances = []
+                findings.append((text, instances))
+        elif level == INSTANCE_LEVEL and text and instances is not None:
+            instances.append(text)
+        if text:
+            found.append((level, text))
+    return Extraction(found, findings)
+
+
+def extract(docx_path, backend="xml", levels=LEVELS):
+    """Read docx_path once and return its Extraction."""
+    return collect(iter_headings(docx_path, levels, backend))
+
+
+def heading_tree(headings):
+    """Nest (level, text) pairs into a tree in a single pass.
+
+    Returns the root {"counts": {level: n}, "children": [node, ...]}, where a
+    node is {"level", "text", "counts", "children"} and counts holds how many
+    headings of each level are below it. A heading closes every open heading
+    at its level or deeper. An empty one is left out together with the
+    headings under it, as an empty Heading 3 is for findings.
+    """
+    root = {"counts": {}, "children": []}
+    # (level, node) of the open headings, None for an empty one
+    stack = [(0, root)]
+    for level, text in headings:
+        while stack[-1][0] >= level:
+            stack.pop()
+        parent = stack[-1][1]
+        node = None
+        if text and parent is not None:
+            node = {"level": level, "text": text, "counts": {}, "children": []}
+            parent["children"].append(node)
+            for _, ancestor in stack:
+                ancestor["counts"][level] = ancestor["counts"].get(level, 0) + 1
+        stack.append((level, node))
+    return root
+
+
+def report_properties(docx_path):
+    """Return the ReportProperties of a .docx without reading its document part."""
+    with zipfile.ZipFile(docx_path) as package:
+        core_path = _part_path(package, "", CORE_PROPERTIES_REL)
+        if core_path is None:
+            return ReportProperties("", "", "", "")
+        core = ET.fromstring(package.read(core_path))
+
+    def value(tag):
+        elem = core.find(tag)
+        return (elem.text or "").strip() if elem is not None else ""
+
+    return ReportProperties(value(DC + "title"), value(DC + "creator"),
+                            value(DCTERMS + "created"), value(DCTERMS + "modified"))
+
+
+def find_reports(directory):
+    """Return every .docx under directory, sorted by path, skipping Word's ~$ lock files."""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(".docx") and not name.startswith("~$"):
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+
+def write_lines(output_txt, lines):
+    with open(output_txt, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(line + '\n')
+
+
+def heading_lines(extraction):
+    # Every Heading 3 and Heading 4, one per line
+    return [text for _, text in extraction.headings]
+
+
+def findings_and_instances_lines(extraction):
+    # Each finding after a blank line, followed by its instances
+    return [
+        '\n' + text if level == FINDING_LEVEL else text
+        for level, text in extraction.headings
+    ]
+
+
+def finding_count_lines(extraction, template="{title}\t{count}"):
+    return [
+        template.format(title=title, count=len(instances))
+        for title, instances in extraction.findings
+    ]
@@ -0,0 +1,260 @@
+# Persistent SQLite index of findings across many Word reports
+# Used by Finding_Frequency.py to answer "how often did finding X appear" and
+# how that changed over time, without opening any report again
+
+# Every report is recorded with its content hash, size, mtime and the title,
+# author and date from its document properties, and every finding (Heading 3)
+# with its instance (Heading 4) count. A repeat update only extracts reports
+# that are new or whose content changed, and forgets reports that were removed.
+
+# Finding titles are reduced to a normalized key: numbering such as
+# "Finding 12:" or "3.1.4" is dropped, accents and punctuation are removed and
+# case is folded. Keys that are near-duplicates of one already indexed
+# ("SMB Signing not Required" / "SMB signing not enforced") join its group when
+# the key is first seen, so queries group by a stored id and never compare
+# strings at query time.
+
+# Usage
+#   from findingindex import FindingIndex
+#   with FindingIndex("findings.db") as index:
+#       index.add_report("reports/acme.docx", extraction, properties, digest)
+#       for name, reports, instances in index.top(year=2025):
+#           print(name, reports, instances)
+
+import difflib
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+
+FUZZY_CUTOFF = 0.88
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    date TEXT NOT NULL,
+    year INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS finding_groups (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS finding_keys (
+    key TEXT PRIMARY KEY,
+    group_id INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS findings (
+    report_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    key TEXT NOT NULL,
+    instances INTEGER NOT NULL,
+    PRIMARY KEY (report_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS findings_key ON findings (key, report_id);
+CREATE INDEX IF NOT EXISTS finding_keys_group ON finding_keys (group_id);
+CREATE INDEX IF NOT EXISTS reports_year ON reports (year);
+"""
+
+# "Finding 12:", "VULN-003 -", "H-01.", "#4)" and outline numbers like "3.1.4"
+NUMBERING = re.compile(
+    r"^\s*(?:(?:finding|issue|vulnerability|vuln)\s*)?#?\s*[a-z]{0,5}-?\d+(?:\.\d+)*\s*[:.)\-–—]\s+"
+    r"|^\s*\d+(?:\.\d+)+\s+",
+    re.IGNORECASE,
+)
+NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_title(title):
+    """Return the key a finding title is grouped by."""
+    key = NUMBERING.sub("", title, count=1)
+    key = unicodedata.normalize("NFKD", key.casefold())
+    key = "".join(char for char in key if not unicodedata.combining(char))
+    return NON_WORD.sub(" ", key).strip()
+
+
+def report_date(properties, mtime):
+    # Last saved date from the document properties, then created, then the file's mtime
+    date = (properties.modified or properties.created)[:10]
+    if re.fullmatch(r"\d{4}-\d\d-\d\d", date):
+        return date
+    return time.strftime("%Y-%m-%d", time.localtime(mtime))
+
+
+class FindingIndex:
+    """SQLite store of findings per report, grouped by normalized title."""
+
+    def __init__(self, db_path, fuzzy_cutoff=FUZZY_CUTOFF):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self._keys = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def is_current(self, filename):
+        """Return True when filename is indexed and its size and mtime are unchanged."""
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT size, mtime FROM reports WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns
+
+    def has_digest(self, filename, digest):
+        """Return True when filename is indexed with this content hash.
+
+        The stored size and mtime are refreshed, so a touched but unchanged
+        report is not hashed again next time.
+        """
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        with self.conn:
+            updated = self.conn.execute(
+                "UPDATE reports SET size = ?, mtime = ? WHERE path = ? AND digest = ?",
+                (stat.st_size, stat.st_mtime_ns, path, digest),
+            ).rowcount
+        return updated > 0
+
+    def _group_for(self, key, title):
+        # Existing key, else the group of the closest known key, else a new group
+        if self._keys is None:
+            self._keys = dict(self.conn.execute("SELECT key, group_id FROM finding_keys"))
+        group_id = self._keys.get(key)
+        if group_id is not None:
+            return group_id
+
+        close = difflib.get_close_matches(key, self._keys, n=1, cutoff=self.fuzzy_cutoff) if key else []
+        if close:
+            group_id = self._keys[close[0]]
+        else:
+            group_id = self.conn.execute("INSERT INTO finding_groups (name) VALUES (?)", (title,)).lastrowid
+        self.conn.execute("INSERT INTO finding_keys VALUES (?, ?)", (key, group_id))
+        self._keys[key] = group_id
+        return group_id
+
+    def _forget(self, path):
+        self.conn.execute(
+            "DELETE FROM findings WHERE report_id IN (SELECT id FROM reports WHERE path = ?)", (path,)
+        )
+        self.conn.execute("DELETE FROM reports WHERE path = ?", (path,))
+
+    def add_report(self, filename, extraction, properties, digest):
+        """Record the findings extracted from filename, replacing any earlier run of it."""
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        date = report_date(properties, stat.st_mtime)
+        with self.conn:
+            self._forget(path)
+            report_id = self.conn.execute(
+                "INSERT INTO reports (path, digest, size, mtime, title, author, date, year) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, digest, stat.st_size, stat.st_mtime_ns, properties.title,
+                 properties.author, date, int(date[:4])),
+            ).lastrowid
+            rows = []
+            for seq, (title, instances) in enumerate(extraction.findings):
+                key = normalize_title(title)
+                self._group_for(key, title)
+                rows.append((report_id, seq, title, key, len(instances)))
+            self.conn.executemany("INSERT INTO findings VALUES (?, ?, ?, ?, ?)", rows)
+
+    def remove_stale(self, directories, present):
+        """Forget reports that no longer exist, or that were under one of
+        directories but are not in present. Returns the number removed."""
+        directories = [os.path.join(os.path.abspath(directory), "") for directory in directories]
+        present = {os.path.abspath(filename) for filename in present}
+        stale = [
+            path for (path,) in self.conn.execute("SELECT path FROM reports")
+            if not os.path.isfile(path)
+            or (path not in present and any(path.startswith(directory) for directory in directories))
+        ]
+        with self.conn:
+            for path in stale:
+                self._forget(path)
+        return len(stale)
+
+    def report_count(self, year=None):
+        if year is None:
+            return self.conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM reports WHERE year = ?", (year,)).fetchone()[0]
+
+    def top(self, year=None, limit=20):
+        """Return (group name, reports, instances) for the most widespread findings."""
+        where, params = ("WHERE r.year = ?", (year,)) if year is not None else ("", ())
+        return self.conn.execute(
+            "SELECT g.name, COUNT(DISTINCT f.report_id), SUM(f.instances) "
+            "FROM findings AS f "
+            "JOIN finding_keys AS k ON k.key = f.key "
+            "JOIN finding_groups AS g ON g.id = k.group_id "
+            f"JOIN reports AS r ON r.id = f.report_id {where} "
+            "GROUP BY g.id ORDER BY 2 DESC, 3 DESC, g.name LIMIT ?",
+            params + (limit,),
+        ).fetchall()
+
+    def find_groups(self, text):
+        """Return the ids of the groups text refers to.
+
+        An exact normalized key wins, then the closest keys, then every key
+        that contains the normalized text as a phrase.
+        """
+        key = normalize_title(text)
+        row = self.conn.execute("SELECT group_id FROM finding_keys WHERE key = ?", (key,)).fetchone()
+        if row:
+            return [row[0]]
+        keys = [k for (k,) in self.conn.execute("SELECT key FROM finding_keys")]
+        close = difflib.get_close_matches(key, keys, n=5, cutoff=self.fuzzy_cutoff)
+        if not close:
+            close = [k for k in keys if f" {key} " in f" {k} "]
+        if not close:
+            return []
+        placeholders = ", ".join("?" * len(close))
+        return [group_id for (group_id,) in self.conn.execute(
+            f"SELECT DISTINCT group_id FROM finding_keys WHERE key IN ({placeholders}) ORDER BY group_id", close
+        )]
+
+    def group_name(self, group_id):
+        return self.conn.execute("SELECT name FROM finding_groups WHERE id = ?", (group_id,)).fetchone()[0]
+
+    def variants(self, group_id):
+        """Return (title, reports) for every way the group's finding was written."""
+        return self.conn.execute(
+            "SELECT f.title, COUNT(DISTINCT f.report_id) FROM findings AS f "
+            "JOIN finding_keys AS k ON k.key = f.key WHERE k.group_id = ? "
+            "GROUP BY f.title ORDER BY 2 DESC, f.title",
+            (group_id,),
+        ).fetchall()
+
+    def trend(self, group_id, by="year"):
+        """Return (period, reports with the finding, all reports, instances) per year or month."""
+        period = "r.year" if by == "year" else "substr(r.date, 1, 7)"
+        totals = self.conn.execute(
+            f"SELECT {period} AS period, COUNT(*) FROM reports AS r GROUP BY period ORDER BY period"
+        ).fetchall()
+        # Only the group's own findings are read, through the key index
+        hits = {
+            found: (reports, instances) for found, reports, instances in self.conn.execute(
+                f"SELECT {period} AS period, COUNT(DISTINCT r.id), SUM(f.instances) "
+                "FROM finding_keys AS k "
+                "JOIN findings AS f ON f.key = k.key "
+                "JOIN reports AS r ON r.id = f.report_id "
+                "WHERE k.group_id = ? GROUP BY period",
+                (group_id,),
+            )
+        }
+        return [
+            (found, hits.get(found, (0, 0))[0], total, hits.get(found, (0, 0))[1])
+            for found, total in totals
+        ]
@@ -0,0 +1,200 @@
+# Persistent SQLite index of parsed NMAP Grepable (.gnmap) files
+# Used by Ncomb.py --index so repeat runs only parse newly appended scans
+
+# Each indexed file is recorded with its size, mtime and the byte offset of the
+# last complete line that was parsed. On the next run only the bytes after that
+# offset are read. If the file shrank or the bytes it started with changed, the
+# file was rewritten and is indexed again from the start. Only the part of the
+# first block that had been parsed is compared, so appending to a file smaller
+# than HEAD_SIZE is not mistaken for a rewrite.
+
+# The index is only a cache of the scan files, so a database written with an
+# older table layout is dropped and rebuilt on open.
+
+# Usage
+#   from gnmapindex import GnmapIndex
+#   with GnmapIndex("scans.db") as index:
+#       index.update("nmapScanResults.gnmap")
+#       for host in index.hosts_with_port("nmapScanResults.gnmap", 445, protos=["tcp"]):
+#           print(host.ip)
+
+import hashlib
+import os
+import sqlite3
+
+from gnmapparse import GnmapHost, GnmapPort, iter_hosts
+
+HEAD_SIZE = 4096
+BATCH_SIZE = 10000
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    head TEXT NOT NULL,
+    head_len INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    ip TEXT NOT NULL,
+    hostname TEXT NOT NULL,
+    os TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ports (
+    host_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    port INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    proto TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    service TEXT NOT NULL,
+    rpcinfo TEXT NOT NULL,
+    info TEXT NOT NULL,
+    PRIMARY KEY (host_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hosts_path_ip ON hosts (path, ip);
+CREATE INDEX IF NOT EXISTS ports_port ON ports (port, state, host_id);
+"""
+
+
+def _head_digest(f, length):
+    f.seek(0)
+    return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def _read_complete_lines(f, offset, encoding, progress):
+    # Yield decoded lines after offset, stopping at a partial last line so a
+    # scan that is still being written is picked up on the next run
+    f.seek(offset)
+    for raw in f:
+        if not raw.endswith(b"\n"):
+            break
+        progress[0] += len(raw)
+        yield raw.decode(encoding)
+
+
+class GnmapIndex:
+    """SQLite store of hosts and ports parsed from one or more gnmap files."""
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS hosts; DROP TABLE IF EXISTS ports;"
+            )
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _forget(self, path):
+        self.conn.execute(
+            "DELETE FROM ports WHERE host_id IN (SELECT id FROM hosts WHERE path = ?)", (path,)
+        )
+        self.conn.execute("DELETE FROM hosts WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def _insert(self, path, hosts):
+        next_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM hosts").fetchone()[0]
+        host_rows = []
+        port_rows = []
+        for host in hosts:
+            host_rows.append((next_id, path, host.ip, host.hostname, host.os))
+            for seq, port in enumerate(host.ports):
+                port_rows.append((next_id, seq, int(port.port), *port[1:]))
+            next_id += 1
+
+            if len(host_rows) >= BATCH_SIZE:
+                self._flush(host_rows, port_rows)
+                host_rows, port_rows = [], []
+
+        self._flush(host_rows, port_rows)
+
+    def _flush(self, host_rows, port_rows):
+        self.conn.executemany("INSERT INTO hosts VALUES (?, ?, ?, ?, ?)", host_rows)
+        self.conn.executemany("INSERT INTO ports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", port_rows)
+
+    def update(self, filename, encoding="ISO-8859-1"):
+        """Bring the index up to date with filename.
+
+        Returns the number of bytes parsed, 0 when the file is unchanged.
+        """
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime, offset, head, head_len FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return 0
+
+        with open(path, "rb") as f:
+            offset = 0
+            if row and stat.st_size >= row[2] and _head_digest(f, row[4]) == row[3]:
+                offset = row[2]
+
+            progress = [offset]
+            with self.conn:
+                if offset == 0:
+                    self._forget(path)
+                self._insert(path, iter_hosts(_read_complete_lines(f, offset, encoding, progress)))
+                # Fingerprint only bytes that were parsed, an append never touches them
+                head_len = min(HEAD_SIZE, progress[0])
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns, progress[0], _head_digest(f, head_len), head_len),
+                )
+
+        return progress[0] - offset
+
+    def _hosts(self, where, params):
+        # Rebuild GnmapHost records in file order from the hosts matching where.
+        # Ports are clustered by (host_id, seq) so each host's ports are one range
+        hosts = []
+        last_id = None
+        for host_id, ip, hostname, os_name, port, *fields in self.conn.execute(
+            "SELECT h.id, h.ip, h.hostname, h.os, p.port, p.state, p.proto, p.owner, p.service, p.rpcinfo, p.info "
+            "FROM hosts AS h LEFT JOIN ports AS p ON p.host_id = h.id "
+            f"WHERE {where} ORDER BY h.id, p.seq",
+            params,
+        ):
+            if host_id != last_id:
+                hosts.append(GnmapHost(ip, hostname, [], os_name))
+                last_id = host_id
+            if port is not None:
+                hosts[-1].ports.append(GnmapPort(str(port), *fields))
+
+        return hosts
+
+    def hosts(self, filename):
+        """Return every host recorded for filename, in file order."""
+        return self._hosts("h.path = ?", (os.path.abspath(filename),))
+
+    def host(self, filename, ip):
+        """Return the entries for one IP, including all of its ports."""
+        return self._hosts("h.path = ? AND h.ip = ?", (os.path.abspath(filename), ip))
+
+    def hosts_with_port(self, filename, port, state="open", protos=None):
+        """Return the hosts in filename that have port in the given state.
+
+        protos limits the match to those protocols, e.g. ["tcp"], so 445/udp
+        does not count as 445/tcp. None matches any protocol.
+        """
+        where = "port = ? AND state = ?"
+        params = [os.path.abspath(filename), int(port), state]
+        if protos is not None:
+            protos = list(protos)
+            where += f" AND proto IN ({', '.join('?' * len(protos))})"
+            params += protos
+        return self._hosts(f"h.path = ? AND h.id IN (SELECT host_id FROM ports WHERE {where})", params)
@@ -0,0 +1,173 @@
+# Streaming parser for NMAP Grepable (.gnmap) files
+# Shared by Ncomb.py and ncomb.py so both combs read the file the same way
+
+# The file is read one line at a time and only "Host:" lines that carry a
+# "Ports:" field are matched, so memory stays flat on large sweeps. The port
+# entries themselves are split on "/" rather than matched with a regex.
+
+# Usage
+#   from gnmapparse import parse_gnmap
+#   for host in parse_gnmap("nmapScanResults.gnmap"):
+#       print(host.ip, [port.port for port in host.ports])
+#
+#   from gnmapparse import parse_gnmap_dir
+#   for host in parse_gnmap_dir("engagement/NMAP"):
+#       ...
+
+import os
+import re
+from collections import namedtuple
+from itertools import repeat
+from multiprocessing import Pool
+
+GnmapHost = namedtuple("GnmapHost", ["ip", "hostname", "ports", "os"], defaults=[""])
+# Fields are in the order nmap writes them: port/state/proto/owner/service/rpcinfo/version
+GnmapPort = namedtuple("GnmapPort", ["port", "state", "proto", "owner", "service", "rpcinfo", "info"])
+
+HOST_PREFIX = "Host: "
+OS_MARKER = "\tOS: "
+
+# Regular expression pattern is compiled once at import time. It anchors on the
+# start of the line and captures the IP, hostname and the Ports field up to the
+# next tab, so Status lines fail within a few characters.
+HOST_PATTERN = re.compile(
+    r"Host:\s+(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})(?:\s+\(([^)]*)\))?\s+Ports:\s+([^\t\r\n]*)"
+)
+
+
+def parse_ports(ports):
+    """Split the Ports section of a gnmap line into GnmapPort records.
+
+    Each entry is port/state/proto/owner/service/rpcinfo/version/ and entries
+    are separated by ", ". nmap writes any "/" inside a field as "|", so once
+    the "/, " separators are folded away the whole section splits into a flat
+    run of fields, seven per port, with no regex involved. Every state and
+    protocol is kept, e.g. 161/open|filtered/udp//snmp///.
+    """
+    fields = ports.replace("/, ", "/").split("/")
+    # A well formed section ends with "/", which leaves one empty field over.
+    # Group the rest seven at a time and build the records without a Python loop
+    if len(fields) % 7 == 1 and not fields[-1]:
+        fields.pop()
+        return list(map(tuple.__new__, repeat(GnmapPort), zip(*[iter(fields)] * 7)))
+
+    return _parse_ports_slow(ports)
+
+
+def _parse_ports_slow(ports):
+    # Entry by entry fallback for truncated lines, skips anything incomplete
+    if ports.endswith("/"):
+        ports = ports[:-1]
+
+    records = []
+    for entry in ports.split("/, "):
+        fields = entry.split("/")
+        if len(fields) == 7 and fields[0].isdigit():
+            records.append(GnmapPort._make(fields))
+    return records
+
+
+def iter_hosts(lines):
+    """Yield a GnmapHost for every line that lists ports for a host."""
+    for line in lines:
+        # Cheap prefix check so comment and Status lines never reach the regex
+        if not line.startswith(HOST_PREFIX):
+            continue
+
+        match = HOST_PATTERN.match(line)
+        if match is None:
+            continue
+        ip, hostname, ports = match.groups()
+
+        # The OS field is only present when the scan used -O
+        os_name = ""
+        os_index = line.find(OS_MARKER)
+        if os_index != -1:
+            os_name = line[os_index + len(OS_MARKER):].split("\t", 1)[0].rstrip("\r\n")
+
+        yield GnmapHost(ip, hostname or "", parse_ports(ports), os_name)
+
+
+def parse_gnmap(filename, encoding="ISO-8859-1"):
+    """Lazily yield a GnmapHost for each host with ports in a gnmap file."""
+    with open(filename, "r", encoding=encoding) as f:
+        yield from iter_hosts(f)
+
+
+def find_gnmap_files(directory):
+    """Return every .gnmap file under directory, sorted by path."""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if name.endswith(".gnmap"):
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+
+def ip_sort_key(ip):
+    """Sort IPv4 addresses numerically rather than as text."""
+    return tuple(int(octet) for octet in ip.split("."))
+
+
+def port_sort_key(port):
+    return (int(port.port), port.proto)
+
+
+def _parse_file(filename):
+    # Worker for parse_gnmap_dir, runs in a child process
+    return list(parse_gnmap(filename))
+
+
+def _better_port(port, current):
+    # An open result beats any other state, then service details beat none
+    if (port.state == "open") != (current.state == "open"):
+        return port.state == "open"
+    return not current.service and bool(port.service)
+
+
+def merge_hosts(host_lists):
+    """Merge hosts seen in several files into one GnmapHost per IP.
+
+    Ports are the union across all files. When the same port appears more
+    than once, the first open record with service details wins, so the result
+    only depends on the order of host_lists and not on worker timing.
+    """
+    hostnames = {}
+    os_names = {}
+    merged = {}
+    for hosts in host_lists:
+        for host in hosts:
+            if host.hostname and not hostnames.get(host.ip):
+                hostnames[host.ip] = host.hostname
+            if host.os and not os_names.get(host.ip):
+                os_names[host.ip] = host.os
+            ports = merged.setdefault(host.ip, {})
+            for port in host.ports:
+                key = (port.port, port.proto)
+                current = ports.get(key)
+                if current is None or _better_port(port, current):
+                    ports[key] = port
+
+    return [
+        GnmapHost(
+            ip,
+            hostnames.get(ip, ""),
+            sorted(merged[ip].values(), key=port_sort_key),
+            os_names.get(ip, ""),
+        )
+        for ip in sorted(merged, key=ip_sort_key)
+    ]
+
+
+def parse_gnmap_dir(directory, processes=None):
+    """Parse every .gnmap file under directory across a process pool.
+
+    Returns a list of GnmapHost, one per IP, sorted by address.
+    """
+    filenames = find_gnmap_files(directory)
+    if len(filenames) < 2:
+        return merge_hosts(_parse_file(filename) for filename in filenames)
+
+    # imap hands results back in file order, whichever worker finishes first
+    with Pool(processes) as pool:
+        return merge_hosts(pool.imap(_parse_file, filenames))
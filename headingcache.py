@@ -0,0 +1,89 @@
+# Persistent SQLite cache of heading extractions from Word reports
+# Used by Extract_and_Count_Word_Headers.py in batch mode so unchanged reports
+# are not parsed again
+
+# Entries are keyed by the SHA-256 of the report's content, so a report that is
+# renamed, copied or touched is still a hit, and one that is edited is a miss.
+# The docxheadings.ENGINE_VERSION is part of the key, so a change to the
+# extraction rules never serves results made by the old ones.
+
+# Usage
+#   from headingcache import HeadingCache, file_digest
+#   with HeadingCache("headings_cache.db") as cache:
+#       digest = file_digest("report.docx")
+#       extraction = cache.get(digest)
+#       if extraction is None:
+#           extraction = extract("report.docx")
+#           cache.put(digest, extraction)
+#   print(cache.hits, cache.misses)
+
+import hashlib
+import json
+import sqlite3
+
+from docxheadings import ENGINE_VERSION, Extraction
+
+READ_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    digest TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    headings TEXT NOT NULL,
+    findings TEXT NOT NULL,
+    PRIMARY KEY (digest, version)
+) WITHOUT ROWID;
+"""
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file, read a block at a time."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HeadingCache:
+    """SQLite store of one Extraction per report content hash."""
+
+    def __init__(self, db_path, version=ENGINE_VERSION):
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def get(self, digest):
+        """Return the cached Extraction for digest, or None on a miss."""
+        row = self.conn.execute(
+            "SELECT headings, findings FROM extractions WHERE digest = ? AND version = ?",
+            (digest, self.version),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        headings, findings = json.loads(row[0]), json.loads(row[1])
+        return Extraction(
+            [tuple(heading) for heading in headings],
+            [(title, instances) for title, instances in findings],
+        )
+
+    def put(self, digest, extraction):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+            (digest, self.version, json.dumps(extraction.headings), json.dumps(extraction.findings)),
+        )
+        self.conn.commit()
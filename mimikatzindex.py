@@ -0,0 +1,166 @@
+# Persistent SQLite dedup index of credentials parsed from mimikatz dumps
+# Used by ParseMimikatzOutput.py when several dumps or a directory are given
+
+# Every (user, domain, NTLM) is stored once, with a sighting per dump it was
+# found in. Each dump is recorded with its size and mtime, so a repeat run only
+# parses dumps that are new or have changed since they were indexed. The host
+# a dump came from is taken from its file name, e.g. DC01.txt -> DC01. Dumps
+# that were deleted, or moved out of a directory that is indexed again, are
+# dropped along with any credential only they contained.
+
+# Usage
+#   from mimikatzindex import MimikatzIndex
+#   with MimikatzIndex("mimikatz.db") as index:
+#       if index.is_current("dumps/DC01.txt"):
+#           ...
+#       for ntlm, accounts in index.hash_reuse():
+#           print(ntlm, len(accounts))
+
+import os
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dumps (
+    path TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS credentials (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    ntlm TEXT NOT NULL,
+    UNIQUE (user, domain, ntlm)
+);
+CREATE TABLE IF NOT EXISTS sightings (
+    cred_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (cred_id, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS credentials_ntlm ON credentials (ntlm);
+CREATE INDEX IF NOT EXISTS sightings_path ON sightings (path);
+"""
+
+
+def dump_host(path):
+    """Name of the host a dump came from, taken from its file name."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+class MimikatzIndex:
+    """SQLite store of unique credentials and the dumps they were seen in."""
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def is_current(self, filename):
+        """Return True when filename is indexed and has not changed since."""
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime FROM dumps WHERE path = ?", (path,)
+        ).fetchone()
+        return row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns
+
+    def add_dump(self, filename, users):
+        """Record the users parsed from filename, replacing any earlier run of it.
+
+        Returns the number of credentials that were not in the index before.
+        """
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        with self.conn:
+            self.conn.execute("DELETE FROM sightings WHERE path = ?", (path,))
+
+            before = self.conn.execute("SELECT COUNT(*) FROM credentials").fetchone()[0]
+            rows = [(user['User'], user['Domain'] or "", user['NTLM Hash']) for user in users]
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO credentials (user, domain, ntlm) VALUES (?, ?, ?)", rows
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO sightings "
+                "SELECT id, ? FROM credentials WHERE user = ? AND domain = ? AND ntlm = ?",
+                [(path,) + row for row in rows],
+            )
+            # A changed dump may no longer contain credentials only it had
+            self.conn.execute(
+                "DELETE FROM credentials WHERE id NOT IN (SELECT cred_id FROM sightings)"
+            )
+            after = self.conn.execute("SELECT COUNT(*) FROM credentials").fetchone()[0]
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO dumps VALUES (?, ?, ?, ?)",
+                (path, dump_host(path), stat.st_size, stat.st_mtime_ns),
+            )
+        return max(after - before, 0)
+
+    def remove_stale(self, directories, present):
+        """Forget dumps that no longer exist, or that were in one of directories
+        but are not in present (the dumps found there now).
+
+        Returns the number of dumps removed.
+        """
+        directories = {os.path.abspath(directory) for directory in directories}
+        present = {os.path.abspath(filename) for filename in present}
+        stale = [
+            (path,) for (path,) in self.conn.execute("SELECT path FROM dumps")
+            if not os.path.isfile(path) or (os.path.dirname(path) in directories and path not in present)
+        ]
+        if stale:
+            with self.conn:
+                self.conn.executemany("DELETE FROM sightings WHERE path = ?", stale)
+                self.conn.executemany("DELETE FROM dumps WHERE path = ?", stale)
+                self.conn.execute(
+                    "DELETE FROM credentials WHERE id NOT IN (SELECT cred_id FROM sightings)"
+                )
+        return len(stale)
+
+    def dump_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM dumps").fetchone()[0]
+
+    def _credentials(self, where="1", params=()):
+        # Yield (user, domain, ntlm, hosts) with the hosts as a sorted list
+        for user, domain, ntlm, hosts in self.conn.execute(
+            "SELECT c.user, c.domain, c.ntlm, GROUP_CONCAT(DISTINCT d.host) "
+            "FROM credentials AS c "
+            "JOIN sightings AS s ON s.cred_id = c.id "
+            "JOIN dumps AS d ON d.path = s.path "
+            f"WHERE {where} GROUP BY c.id ORDER BY c.ntlm, c.domain, c.user",
+            params,
+        ):
+            yield user, domain, ntlm, sorted(hosts.split(","))
+
+    def credentials(self):
+        """Return every unique (user, domain, ntlm, hosts) in the index."""
+        return list(self._credentials())
+
+    def hash_reuse(self):
+        """Return (ntlm, accounts) for every NTLM hash shared by several accounts.
+
+        accounts is a list of (user, domain, hosts). Hashes used by the most
+        accounts come first.
+        """
+        reused = self.conn.execute(
+            "SELECT ntlm FROM credentials GROUP BY ntlm HAVING COUNT(*) > 1 "
+            "ORDER BY COUNT(*) DESC, ntlm"
+        ).fetchall()
+
+        report = []
+        for (ntlm,) in reused:
+            accounts = [
+                (user, domain, hosts)
+                for user, domain, _, hosts in self._credentials("c.ntlm = ?", (ntlm,))
+            ]
+            report.append((ntlm, accounts))
+        return report
@@ -3,41 +3,51 @@
 # Combs NMAP Grepable File for all ports and services associated with each IP
 
 # Aggregate findings from sub folders with
-# find . -type f -name "*.gnmap" -exec echo {} \; -exec python3 /opt/ncomb/ncomb.py {} \; -exec echo \; 
+# python3 /opt/ncomb/ncomb.py --recursive <engagement folder>
+# Every *.gnmap file below the folder is parsed across a process pool and each
+# IP is printed once with the ports found in all files.
 
 # Usage python script_name.py nmapScanResults.gnmap
+#       python script_name.py --recursive <directory>
 
+import os
 import sys
-import re
 
-# Check if the file name is provided as an argument
-if len(sys.argv) < 2:
-    print("Usage: python script_name.py filename.gnmap")
-    sys.exit(1)
-
-filename = sys.argv[1]
-
-# Open the gnmap file
-with open(filename, "r") as f:
-    lines = f.readlines()
-
-# Regular expression pattern to extract IP and port information
-pattern = r"Host:\s+(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}).*Ports:\s+(.*)"
+from gnmapparse import parse_gnmap, parse_gnmap_dir
+
+
+def main():
+    # Check if the file name is provided as an argument
+    if len(sys.argv) < 2:
+        print("Usage: python script_name.py filename.gnmap")
+        print("       python script_name.py --recursive <directory>")
+        sys.exit(1)
+
+    if sys.argv[1] in ("-r", "--recursive"):
+        if len(sys.argv) < 3:
+            print("Usage: python script_name.py --recursive <directory>")
+            sys.exit(1)
+        if not os.path.isdir(sys.argv[2]):
+            print(f"Error: The directory '{sys.argv[2]}' does not exist.")
+            sys.exit(1)
+        hosts = parse_gnmap_dir(sys.argv[2])
+    else:
+        # Stream hosts from the gnmap file one line at a time
+        hosts = parse_gnmap(sys.argv[1])
+
+    for host in hosts:
+        # Print IP address and Host Notes
+        print(f"\n",host.ip,f"\n   Hostname - {host.hostname}\n   OS - {host.os}\n   Local - \n   Proof - \n")
 
-# Iterate through each line in the file
-for line in lines:
-    # Search for the pattern in the line
-    match = re.search(pattern, line)
-    if match:
-        ip = match.group(1)  # Extract IP address
-        ports = match.group(2)  # Extract port information
+        # Print port information for each open port in a single write per host
+        lines = [
+            f"{port.port}/{port.service}/{port.proto}  {port.state}  {port.service}"
+            for port in host.ports
+            if port.state == "open"
+        ]
+        if lines:
+            print("\n".join(lines))
 
-        # Split port information into individual ports
-        port_list = re.findall(r"(\d+)/open/tcp//([^/]*)", ports)
-        
-        # Print IP address and Host Notes
-        print(f"\n",ip,"\n   Hostname - \n   OS - \n   Local - \n   Proof - \n")
 
-        # Print port information for each port
-        for port, service in port_list:
-            print(f"{port}/{service}/tcp  open  {service}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# Columnar export of parsed NMAP results
+# Used by Ncomb.py --csv / --npz / --summary
+
+# Rows are one per (host, port) and are written in batches while the scan is
+# streamed, so nothing is held as per-line Python objects. The .npz table keeps
+# the IP as uint32 and the port as uint16, with proto, state, service and info
+# stored as integer codes into small vocabularies, which lets the summaries run
+# as vectorized NumPy operations instead of line-by-line loops.
+
+# Usage
+#   from nmapexport import ScanExporter, load_table, port_summary, subnet_summary
+#   with ScanExporter(csv_path="scan.csv", npz_path="scan.npz") as exporter:
+#       for host in parse_gnmap("nmapScanResults.gnmap"):
+#           exporter.add(host)
+#   table = load_table("scan.npz")
+#   for port, proto, hosts in port_summary(table)[:20]:
+#       print(port, proto, hosts)
+
+import csv
+import socket
+
+BATCH_SIZE = 50000
+CSV_HEADER = ["ip", "hostname", "os", "port", "proto", "state", "service", "info"]
+CODE_COLUMNS = ["proto", "state", "service", "info"]
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        print("[!] NumPy is required for .npz export and summaries: pip install numpy")
+        raise SystemExit(1)
+    return numpy
+
+
+def ip_to_int(ip):
+    """Return an IPv4 address as an int, or None for anything else."""
+    try:
+        return int.from_bytes(socket.inet_aton(ip), "big")
+    except OSError:
+        return None
+
+
+def int_to_ip(value):
+    return socket.inet_ntoa(int(value).to_bytes(4, "big"))
+
+
+class ScanExporter:
+    """Write (host, port) rows to CSV and/or a NumPy .npz table in batches.
+
+    Hosts without an IPv4 address are written to the CSV only, since the
+    .npz ip column is uint32.
+    """
+
+    def __init__(self, csv_path=None, npz_path=None, batch_size=BATCH_SIZE):
+        self.npz_path = npz_path
+        self.batch_size = batch_size
+        self.rows = 0
+
+        self.csv_file = None
+        self.csv_writer = None
+        self.csv_rows = []
+        if csv_path:
+            self.csv_file = open(csv_path, "w", newline="", encoding="utf-8")
+            self.csv_writer = csv.writer(self.csv_file)
+            self.csv_writer.writerow(CSV_HEADER)
+
+        self.np = _require_numpy() if npz_path else None
+        self.vocab = {name: {} for name in CODE_COLUMNS}
+        self.chunks = {name: [] for name in ["ip", "port"] + CODE_COLUMNS}
+        self.batch = {name: [] for name in self.chunks}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _code(self, column, value):
+        codes = self.vocab[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+
+    def add(self, host):
+        if self.csv_writer:
+            for port in host.ports:
+                self.csv_rows.append(
+                    [host.ip, host.hostname, host.os, port.port, port.proto, port.state, port.service, port.info]
+                )
+
+        if self.np is not None:
+            ip = ip_to_int(host.ip)
+            if ip is not None:
+                batch = self.batch
+                for port in host.ports:
+                    batch["ip"].append(ip)
+                    batch["port"].append(int(port.port))
+                    batch["proto"].append(self._code("proto", port.proto))
+                    batch["state"].append(self._code("state", port.state))
+                    batch["service"].append(self._code("service", port.service))
+                    batch["info"].append(self._code("info", port.info))
+
+        self.rows += len(host.ports)
+        if len(self.csv_rows) >= self.batch_size or len(self.batch["ip"]) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self.csv_rows:
+            self.csv_writer.writerows(self.csv_rows)
+            self.csv_rows = []
+
+        if self.np is not None and self.batch["ip"]:
+            np = self.np
+            dtypes = {"ip": np.uint32, "port": np.uint16, "proto": np.uint8, "state": np.uint8}
+            for name, values in self.batch.items():
+                self.chunks[name].append(np.array(values, dtype=dtypes.get(name, np.uint32)))
+                values.clear()
+
+    def close(self):
+        self._flush()
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None
+
+        if self.np is not None:
+            np = self.np
+            arrays = {}
+            for name, chunks in self.chunks.items():
+                arrays[name] = np.concatenate(chunks) if chunks else np.array([], dtype=np.uint32)
+            for name in CODE_COLUMNS:
+                arrays[f"{name}_values"] = np.array(list(self.vocab[name]), dtype=str)
+            np.savez(self.npz_path, **arrays)
+            self.np = None
+
+
+def load_table(npz_path):
+    """Load an exported .npz table as a dict of column arrays."""
+    np = _require_numpy()
+    with np.load(npz_path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _open_keys(table):
+    # Distinct (ip, port, proto) of the open rows packed into one uint64 each,
+    # so a host listed twice (overlapping scans, merged files) counts once
+    np = _require_numpy()
+    states = list(table["state_values"])
+    if "open" not in states:
+        return np.array([], dtype=np.uint64)
+    is_open = table["state"] == states.index("open")
+
+    keys = table["ip"][is_open].astype(np.uint64) << np.uint64(24)
+    keys |= table["port"][is_open].astype(np.uint64) << np.uint64(8)
+    keys |= table["proto"][is_open].astype(np.uint64)
+    return np.unique(keys)
+
+
+def port_summary(table):
+    """Return (port, proto, hosts) rows for open ports, most common first."""
+    np = _require_numpy()
+    keys = _open_keys(table)
+
+    # The low 24 bits are port and proto, one more unique() groups by them
+    values, counts = np.unique(keys & np.uint64(0xFFFFFF), return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    protos = table["proto_values"]
+    return [(int(values[i]) >> 8, str(protos[int(values[i]) & 0xFF]), int(counts[i])) for i in order]
+
+
+def subnet_summary(table):
+    """Return (subnet, hosts, open ports) rows per /24, most exposed first."""
+    np = _require_numpy()
+    ips = _open_keys(table) >> np.uint64(24)
+
+    subnets, port_counts = np.unique(ips >> np.uint64(8), return_counts=True)
+    host_subnets, host_counts = np.unique(np.unique(ips) >> np.uint64(8), return_counts=True)
+    # Both unique() results are sorted, so the host counts line up with subnets
+    order = np.argsort(-port_counts, kind="stable")
+    return [
+        (f"{int_to_ip(int(subnets[i]) << 8)}/24", int(host_counts[i]), int(port_counts[i]))
+        for i in order
+    ]
@@ -0,0 +1,109 @@
+# Streaming reader for NMAP XML (-oX) files
+# Produces the same GnmapHost/GnmapPort records as gnmapparse.py, with the
+# hostname, best OS match and service version that the grepable format drops
+
+# The file is read with iterparse and every <host> element is cleared from the
+# tree once it has been turned into a record, so memory stays flat no matter
+# how large the sweep is. A file cut short (nmap still running, or killed)
+# yields every host that was complete and then warns instead of failing.
+
+# Usage
+#   from nmapxml import parse_nmap_xml
+#   for host in parse_nmap_xml("nmapScanResults.xml"):
+#       print(host.ip, host.hostname, host.os)
+
+import sys
+import xml.etree.ElementTree as ET
+
+from gnmapparse import GnmapHost, GnmapPort
+
+SNIFF_SIZE = 512
+
+
+def is_nmap_xml(filename):
+    """Return True when filename looks like NMAP XML rather than grepable output."""
+    with open(filename, "rb") as f:
+        head = f.read(SNIFF_SIZE).lstrip()
+    return head.startswith(b"<?xml") or head.startswith(b"<nmaprun")
+
+
+def service_info(service):
+    # Build the version string the way nmap writes it in the grepable output
+    if service is None:
+        return ""
+    info = " ".join(
+        value for value in (service.get("product"), service.get("version")) if value
+    )
+    extrainfo = service.get("extrainfo")
+    if extrainfo:
+        info = f"{info} ({extrainfo})" if info else f"({extrainfo})"
+    return info
+
+
+def host_record(host):
+    """Turn a <host> element into a GnmapHost, or None if it has no ports."""
+    ports_elem = host.find("ports")
+    if ports_elem is None:
+        return None
+
+    # Prefer the IPv4 address, as the grepable comb does
+    ip = ""
+    for address in host.iter("address"):
+        addrtype = address.get("addrtype")
+        if addrtype == "ipv4":
+            ip = address.get("addr")
+            break
+        if addrtype == "ipv6" and not ip:
+            ip = address.get("addr")
+    if not ip:
+        return None
+
+    hostname = host.find("hostnames/hostname")
+    osmatch = host.find("os/osmatch")
+
+    ports = []
+    for port in ports_elem.iter("port"):
+        state = port.find("state")
+        service = port.find("service")
+        owner = port.find("owner")
+        ports.append(GnmapPort(
+            port=port.get("portid"),
+            state=state.get("state") if state is not None else "",
+            proto=port.get("protocol"),
+            owner=owner.get("name", "") if owner is not None else "",
+            service=service.get("name", "") if service is not None else "",
+            rpcinfo="",
+            info=service_info(service),
+        ))
+
+    return GnmapHost(
+        ip,
+        hostname.get("name", "") if hostname is not None else "",
+        ports,
+        osmatch.get("name", "") if osmatch is not None else "",
+    )
+
+
+def parse_nmap_xml(filename):
+    """Lazily yield a GnmapHost for each scanned host in an NMAP XML file.
+
+    If the XML breaks off or is malformed, the hosts read up to that point
+    are kept and a warning is printed to stderr.
+    """
+    context = ET.iterparse(filename, events=("start", "end"))
+    root = None
+    hosts = 0
+    try:
+        for event, elem in context:
+            if root is None:
+                root = elem
+            elif event == "end" and elem.tag == "host":
+                record = host_record(elem)
+                # Drop the finished host (and anything before it) from the tree
+                root.clear()
+                hosts += 1
+                if record is not None:
+                    yield record
+    except ET.ParseError as e:
+        print(f"[!] '{filename}' is truncated or malformed ({e}), "
+              f"stopped after {hosts} complete hosts", file=sys.stderr)
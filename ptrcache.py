@@ -0,0 +1,80 @@
+# Persistent SQLite cache of reverse DNS (PTR) results
+# Used by ResolveListOfIPs.py so re-runs skip addresses resolved recently
+
+# Both names and failed lookups are cached, timeouts are not since they are
+# usually transient. Entries older than the TTL are evicted when the cache is
+# opened and are treated as misses if they expire during a run.
+
+# Usage
+#   from ptrcache import PtrCache
+#   with PtrCache("ptr_cache.db", ttl=86400) as cache:
+#       entry = cache.get("10.0.0.1")
+#       if entry is None:
+#           cache.put("10.0.0.1", "host1.example.com", None)
+#   print(cache.hits, cache.misses, cache.evicted)
+
+import sqlite3
+import time
+
+COMMIT_EVERY = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ptr (
+    ip TEXT PRIMARY KEY,
+    hostname TEXT,
+    error TEXT,
+    resolved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ptr_resolved_at ON ptr (resolved_at);
+"""
+
+
+class PtrCache:
+    """SQLite store of (hostname, error) per IP with TTL based eviction."""
+
+    def __init__(self, db_path, ttl):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.pending = 0
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            self.evicted = self.conn.execute(
+                "DELETE FROM ptr WHERE resolved_at < ?", (time.time() - ttl,)
+            ).rowcount
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def get(self, ip):
+        """Return the cached (hostname, error) for ip, or None on a miss."""
+        row = self.conn.execute(
+            "SELECT hostname, error FROM ptr WHERE ip = ? AND resolved_at >= ?",
+            (ip, time.time() - self.ttl),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row
+
+    def put(self, ip, hostname, error):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO ptr VALUES (?, ?, ?, ?)", (ip, hostname, error, time.time())
+        )
+        # Commit in batches, a run over a large range writes many entries
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.conn.commit()
+            self.pending = 0
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM ptr").fetchone()[0]
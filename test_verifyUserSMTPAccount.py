@@ -0,0 +1,187 @@
+# Tests for verifyUserSMTPAccount.py against a local stub SMTP server
+# Run with python -m unittest test_verifyUserSMTPAccount (or pytest)
+
+# The stub writes its replies in small fragments, splits lines in the middle
+# and spreads replies over 250- continuation lines, so every reply has to be
+# put back together by ReplyReader before it can be matched to a user.
+
+import socket
+import threading
+import time
+import unittest
+
+from verifyUserSMTPAccount import ReplyReader, SmtpProtocolError, verify_users
+
+
+class StubSmtpServer:
+    """Minimal threaded SMTP server, one handler call per connection."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.sock = socket.socket()
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(5)
+        self.port = self.sock.getsockname()[1]
+        self.connections = 0
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        try:
+            self.handler(conn)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def close(self):
+        self.sock.close()
+
+
+def send_fragments(conn, data, size=3):
+    # Write a few bytes at a time, pausing so each piece arrives on its own
+    for i in range(0, len(data), size):
+        conn.sendall(data[i:i + size])
+        time.sleep(0.001)
+
+
+def read_commands(conn):
+    # Yield each command line the client sends
+    buffer = b""
+    while True:
+        data = conn.recv(4096)
+        if not data:
+            return
+        buffer += data
+        while b"\r\n" in buffer:
+            line, buffer = buffer.split(b"\r\n", 1)
+            yield line.decode()
+
+
+def fragmented_session(conn, drop_after=None):
+    send_fragments(conn, b"220-stub.example.com ESMTP\r\n220-second line\r\n220 ready\r\n")
+    vrfys = 0
+    for command in read_commands(conn):
+        if command.startswith("EHLO"):
+            send_fragments(conn, b"250-stub.example.com\r\n250-PIPELI", 5)
+            send_fragments(conn, b"NING\r\n250 8BITMIME\r\n")
+        elif command.startswith("VRFY"):
+            vrfys += 1
+            if drop_after is not None and vrfys > drop_after:
+                return
+            user = command[5:]
+            if user.startswith("multi"):
+                reply = f"250-first line for {user}\r\n250-second line\r\n250 <{user}@stub>\r\n"
+            elif user.startswith("maybe"):
+                reply = f"252 cannot VRFY {user}\r\n"
+            else:
+                reply = f"550-no such user\r\n550 <{user}> rejected\r\n"
+            send_fragments(conn, reply.encode())
+        elif command.startswith("QUIT"):
+            return
+
+
+class ReplyReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def test_split_continuation_lines(self):
+        reader = ReplyReader(self.client, read_timeout=2)
+        threading.Thread(
+            target=send_fragments,
+            args=(self.server, b"250-first\r\n250-sec", 4),
+        ).start()
+        time.sleep(0.05)
+        threading.Thread(target=send_fragments, args=(self.server, b"ond\r\n250 last\r\n550 next\r\n")).start()
+
+        self.assertEqual(reader.read_reply(), (250, "first\nsecond\nlast"))
+        self.assertEqual(reader.read_reply(), (550, "next"))
+
+    def test_stalled_reply_times_out(self):
+        reader = ReplyReader(self.client, read_timeout=0.3)
+        self.server.sendall(b"250-part one\r\n250 never fin")
+        start = time.monotonic()
+        with self.assertRaises(socket.timeout):
+            reader.read_reply()
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_dropped_socket(self):
+        reader = ReplyReader(self.client, read_timeout=2)
+        self.server.sendall(b"250-half a reply\r\n")
+        self.server.close()
+        with self.assertRaises(ConnectionError):
+            reader.read_reply()
+
+    def test_malformed_line(self):
+        reader = ReplyReader(self.client, read_timeout=2)
+        self.server.sendall(b"hello there\r\n")
+        with self.assertRaises(SmtpProtocolError):
+            reader.read_reply()
+
+
+class VerifyUsersTest(unittest.TestCase):
+
+    def test_fragmented_multiline_replies(self):
+        server = StubSmtpServer(fragmented_session)
+        self.addCleanup(server.close)
+        users = [f"{kind}{i}" for i in range(30) for kind in ("multi", "maybe", "nobody")]
+
+        results = list(verify_users(users, "127.0.0.1", server.port, read_timeout=5, batch=7))
+
+        self.assertEqual([result.user for result in results], users)
+        for result in results:
+            self.assertIn(result.user, result.message)
+            expected = {"multi": "exists", "maybe": "unverifiable", "nobody": "unknown"}
+            self.assertEqual(result.status, expected[result.user.rstrip("0123456789")])
+        self.assertEqual(server.connections, 1)
+
+    def test_dropped_session_keeps_answered_users(self):
+        server = StubSmtpServer(lambda conn: fragmented_session(conn, drop_after=10))
+        self.addCleanup(server.close)
+        users = [f"multi{i}" for i in range(25)]
+
+        results = list(verify_users(users, "127.0.0.1", server.port, read_timeout=5, batch=20))
+
+        self.assertEqual([result.user for result in results], users)
+        self.assertTrue(all(result.status == "exists" for result in results))
+        self.assertEqual(server.connections, 3)
+
+    def test_stalled_reply_is_not_given_to_the_next_user(self):
+        def stalling_session(conn):
+            conn.sendall(b"220 stub\r\n")
+            for command in read_commands(conn):
+                if command.startswith("EHLO"):
+                    conn.sendall(b"250-stub\r\n250 PIPELINING\r\n")
+                elif command == "VRFY slow":
+                    time.sleep(1)
+                    conn.sendall(b"250 <slow> late\r\n")
+                elif command.startswith("VRFY"):
+                    conn.sendall(f"550 <{command[5:]}>\r\n".encode())
+
+        server = StubSmtpServer(stalling_session)
+        self.addCleanup(server.close)
+
+        results = list(verify_users(["a", "slow", "b"], "127.0.0.1", server.port, read_timeout=0.3))
+
+        self.assertEqual([result.user for result in results], ["a", "slow", "b"])
+        self.assertEqual(results[1].status, "error")
+        self.assertEqual(results[2].status, "unknown")
+        self.assertIn("<b>", results[2].message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,31 +2,273 @@
 
 # Credit Offsec OSCP Lab.
 
+# Usage python verifyUserSMTPAccount.py <username | usernames.txt> <target_ip> [--port 25]
+#       [--batch 20] [--no-pipelining] [--max-per-session 0]
+#       [--connect-timeout 5] [--read-timeout 10]
+
+# Given a file of usernames, one SMTP session is reused for all of them. When
+# the server advertises PIPELINING the VRFY commands are sent in batches and the
+# replies read back in order. If the server drops the session, or
+# --max-per-session is reached, it reconnects and carries on with the users
+# that have not been answered yet.
+
+# Replies are read through a line buffer, so replies split across packets or
+# spread over several 250- lines are put back together before being matched
+# to a user. If a reply does not arrive within --read-timeout the session is
+# dropped rather than reused, so a late reply can never be taken as the answer
+# for the next user.
+
+import argparse
+import os
 import socket
 import sys
+import time
+from collections import namedtuple
+
+DEFAULT_PORT = 25
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 10.0
+MAX_LINE = 4096
+DEFAULT_BATCH = 20
+MAX_ATTEMPTS = 3
+
+# What a VRFY reply code says about the user
+STATUSES = {
+    250: "exists", 251: "exists",
+    252: "unverifiable",          # server won't confirm, but would accept mail
+    550: "unknown", 551: "unknown", 553: "unknown",
+    500: "vrfy disabled", 502: "vrfy disabled", 504: "vrfy disabled",
+}
+
+VrfyResult = namedtuple("VrfyResult", ["user", "code", "status", "message"])
+
+
+class SmtpProtocolError(Exception):
+    pass
+
+
+class ReplyReader:
+    """Line buffered reader of SMTP replies from a socket.
+
+    Bytes are collected until a full line is in the buffer, however the
+    server splits its writes. read_timeout is the most a whole reply may
+    take, counted from the call to read_reply(), so a server that trickles a
+    byte at a time cannot stall a check forever.
+    """
+
+    def __init__(self, sock, read_timeout=DEFAULT_READ_TIMEOUT):
+        self.sock = sock
+        self.read_timeout = read_timeout
+        self.buffer = bytearray()
+
+    def _readline(self, deadline):
+        while True:
+            end = self.buffer.find(b"\n")
+            if end >= 0:
+                line = bytes(self.buffer[:end + 1])
+                del self.buffer[:end + 1]
+                return line
+            if len(self.buffer) > MAX_LINE:
+                raise SmtpProtocolError("reply line too long")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("timed out waiting for reply")
+            self.sock.settimeout(remaining)
+            data = self.sock.recv(4096)
+            if not data:
+                raise ConnectionError("connection closed by server")
+            self.buffer += data
+
+    def read_reply(self):
+        """Read one SMTP reply, including 250- continuation lines.
+
+        Returns (code, message) with the lines of a multi-line reply joined by
+        newlines.
+        """
+        deadline = time.monotonic() + self.read_timeout
+        code = None
+        lines = []
+        while True:
+            line = self._readline(deadline).rstrip(b"\r\n").decode("utf-8", "replace")
+            if len(line) < 3 or not line[:3].isdigit() or line[3:4] not in ("", " ", "-"):
+                raise SmtpProtocolError(f"malformed reply line: {line!r}")
+            if code is not None and line[:3] != code:
+                raise SmtpProtocolError(f"reply code changed mid-reply: {line!r}")
+            code = line[:3]
+            lines.append(line[4:])
+            # "250-" marks a continuation line, "250 " (or a bare "250") the last one
+            if line[3:4] != "-":
+                return int(code), "\n".join(lines)
+
+
+def vrfy_result(user, code, message):
+    status = STATUSES.get(code, "error")
+    if code == 421:
+        status = "closing"
+    return VrfyResult(user, code, status, message)
+
+
+class SmtpSession:
+    """One SMTP connection: banner, EHLO (or HELO) and VRFY commands."""
+
+    def __init__(self, host, port=DEFAULT_PORT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, helo=None):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.helo = helo or socket.getfqdn()
+        self.sock = None
+        self.reader = None
+        self.banner = ""
+        self.extensions = set()
+        self.commands = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), self.connect_timeout)
+        self.reader = ReplyReader(self.sock, self.read_timeout)
+        self.commands = 0
+
+        code, self.banner = self.reader.read_reply()
+        if code != 220:
+            raise ConnectionError(f"unexpected banner: {code} {self.banner}")
+
+        code, message = self.command(f"EHLO {self.helo}")
+        if code == 250:
+            # Extension keywords are on the lines after the greeting
+            self.extensions = {line.split(" ", 1)[0].upper() for line in message.split("\n")[1:]}
+        else:
+            self.extensions = set()
+            self.command(f"HELO {self.helo}")
+
+    @property
+    def pipelining(self):
+        return "PIPELINING" in self.extensions
+
+    def command(self, line):
+        self.sock.sendall(line.encode() + b"\r\n")
+        return self.reader.read_reply()
+
+    def vrfy_batch(self, users):
+        """VRFY every user in one write, then yield the results in order as replies arrive."""
+        self.sock.settimeout(self.read_timeout)
+        self.sock.sendall(b"".join(b"VRFY " + user.encode() + b"\r\n" for user in users))
+        self.commands += len(users)
+        for user in users:
+            code, message = self.reader.read_reply()
+            yield vrfy_result(user, code, message)
+            if code == 421:
+                return
+
+    def close(self):
+        if self.sock is None:
+            return
+        try:
+            self.sock.sendall(b"QUIT\r\n")
+        except OSError:
+            pass
+        self.sock.close()
+        self.sock = None
+
+
+def verify_users(users, host, port=DEFAULT_PORT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, batch=DEFAULT_BATCH, pipelining=True,
+                 max_per_session=0, helo=None):
+    """Yield a VrfyResult for every user, reusing one SMTP session where possible.
+
+    Users are sent batch at a time when the server advertises PIPELINING (and
+    pipelining is True), otherwise one at a time. Replies already read are
+    kept when a session fails part way through a batch. A user whose reply was
+    lost to a dropped, stalled or garbled session is retried on a new session,
+    up to MAX_ATTEMPTS.
+    """
+    pending = list(users)
+    attempts = {}
+    session = SmtpSession(host, port, connect_timeout, read_timeout, helo)
+    try:
+        while pending:
+            if session.sock is None:
+                session.connect()
+            size = batch if pipelining and session.pipelining else 1
+            if max_per_session:
+                size = min(size, max_per_session - session.commands)
+            group = pending[:size]
+
+            answered = 0
+            error = "server closed the session"
+            try:
+                for result in session.vrfy_batch(group):
+                    if result.status == "closing":
+                        break
+                    answered += 1
+                    yield result
+            except (OSError, SmtpProtocolError) as e:
+                # Never read on from a session whose replies may be out of step
+                error = str(e) or type(e).__name__
+                session.close()
+            del pending[:answered]
+
+            if answered < len(group):
+                # Dropped mid-batch or 421: the first unanswered user is charged
+                # an attempt so a user that always kills the session is not retried forever
+                user = pending[0]
+                attempts[user] = attempts.get(user, 0) + 1
+                if attempts[user] >= MAX_ATTEMPTS:
+                    yield VrfyResult(user, 0, "error", f"no reply after {MAX_ATTEMPTS} attempts: {error}")
+                    del pending[0]
+                session.close()
+            elif max_per_session and session.commands >= max_per_session:
+                session.close()
+    finally:
+        session.close()
 
-if len(sys.argv) != 3:
-        print("Usage: vrfy.py <username> <target_ip>")
-        sys.exit(0)
 
-# Create a Socket
-s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+def read_users(path):
+    with open(path, "r") as file:
+        return [line.strip() for line in file if line.strip()]
 
-# Connect to the Server
-ip = sys.argv[2]
-connect = s.connect((ip,25))
 
-# Receive the banner
-banner = s.recv(1024)
+def main():
+    parser = argparse.ArgumentParser(description="Check which users exist on an SMTP server with VRFY.")
+    parser.add_argument("user", help="username, or a file with one username per line")
+    parser.add_argument("target_ip", help="SMTP server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"SMTP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT, help=f"seconds to wait for the connection (default: {DEFAULT_CONNECT_TIMEOUT})")
+    parser.add_argument("--read-timeout", type=float, default=DEFAULT_READ_TIMEOUT, help=f"seconds to wait for each full reply (default: {DEFAULT_READ_TIMEOUT})")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help=f"VRFY commands per write when pipelining (default: {DEFAULT_BATCH})")
+    parser.add_argument("--no-pipelining", action="store_true", help="send one VRFY at a time even if PIPELINING is advertised")
+    parser.add_argument("--max-per-session", type=int, default=0, help="reconnect after this many VRFY commands (default: never)")
+    parser.add_argument("--helo", help="name to send with EHLO/HELO (default: this host's FQDN)")
+    args = parser.parse_args()
 
-print(banner)
+    users = read_users(args.user) if os.path.isfile(args.user) else [args.user]
+    if args.batch < 1:
+        print("Error: --batch must be at least 1.")
+        sys.exit(1)
 
-# VRFY a user
-user = (sys.argv[1]).encode()
-s.send(b'VRFY ' + user + b'\r\n')
-result = s.recv(1024)
+    start = time.monotonic()
+    count = 0
+    try:
+        for result in verify_users(users, args.target_ip, args.port, args.connect_timeout, args.read_timeout,
+                                   args.batch, not args.no_pipelining, args.max_per_session, args.helo):
+            message = result.message.replace("\n", " / ")
+            print(f"{result.user}: {result.status} ({result.code} {message})", flush=True)
+            count += 1
+    except (OSError, SmtpProtocolError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        elapsed = time.monotonic() - start
+        if count:
+            print(f"[+] {count} users checked in {elapsed:.2f}s, {count / max(elapsed, 1e-9):.1f} verifications/s", file=sys.stderr)
 
-print(result)
 
-# Close the socket
-s.close()
+if __name__ == "__main__":
+    main()